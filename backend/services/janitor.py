@@ -0,0 +1,225 @@
+"""Background clean-up of the storage the backend accumulates.
+
+Three resources grow with every chat: the rows of the session store, the log
+files under ``settings.LOG_DIR`` and the SQL snapshots of the per-session
+databases. The janitor periodically removes what is older than the retention
+configured for each of them. Sessions are deleted in small batches, each in
+its own short transaction, so running chats are never locked out for long.
+The SQLite session store is vacuumed when enough of it is free space.
+"""
+
+import asyncio
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Set
+
+from google.adk.sessions.database_session_service import StorageEvent, StorageSession
+from sqlalchemy import Engine, delete, select, text, tuple_
+
+from backend.tools.session_db import SessionDatabaseManager
+from settings import settings
+from logging_data.logging_config import active_log_files, get_backend_logger
+
+logger = get_backend_logger(__name__)
+
+
+def _size(path: Path) -> int:
+    try:
+        return path.stat().st_size
+    except OSError:
+        return 0
+
+
+_lock_file = None
+
+
+def claim_janitor_role() -> bool:
+    """Return True in the one worker process that should run the janitor.
+
+    The first worker to lock ``LOG_DIR/.janitor.lock`` keeps the lock (and the
+    role) for its lifetime; the others skip the janitor.
+    """
+    global _lock_file
+    if sys.platform == "win32":
+        return True
+    import fcntl
+
+    settings.LOG_DIR.mkdir(parents=True, exist_ok=True)
+    lock_file = open(settings.LOG_DIR / ".janitor.lock", "w")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return False
+    _lock_file = lock_file
+    return True
+
+
+class Janitor:
+    """Applies the retention policies; a retention of 0 days keeps a resource forever"""
+
+    def __init__(self, engine: Engine, session_databases: SessionDatabaseManager):
+        self.engine = engine
+        self.session_databases = session_databases
+        self._last_vacuum = time.monotonic()
+        self._counters = {
+            "runs": 0,
+            "sessions_deleted": 0,
+            "events_deleted": 0,
+            "snapshots_deleted": 0,
+            "log_files_deleted": 0,
+            "vacuums": 0,
+            "bytes_reclaimed": 0,
+        }
+        self._last_run: Dict[str, float] = {}
+
+    def purge_sessions(self) -> Dict[str, int]:
+        """Delete sessions (and their events and SQL snapshots) not updated within the retention"""
+        deleted = {"sessions_deleted": 0, "events_deleted": 0}
+        if settings.SESSION_RETENTION_DAYS <= 0:
+            return deleted
+
+        # ADK writes update_time as a naive local datetime
+        cutoff = datetime.now() - timedelta(days=settings.SESSION_RETENTION_DAYS)
+        while True:
+            with self.engine.begin() as connection:
+                keys = connection.execute(
+                    select(StorageSession.app_name, StorageSession.user_id, StorageSession.id)
+                    .where(StorageSession.update_time < cutoff)
+                    .limit(settings.JANITOR_BATCH_SIZE)
+                ).all()
+                if not keys:
+                    break
+                session_keys = [tuple(key) for key in keys]
+                events = connection.execute(
+                    delete(StorageEvent).where(
+                        tuple_(StorageEvent.app_name, StorageEvent.user_id, StorageEvent.session_id).in_(session_keys)
+                    )
+                )
+                connection.execute(
+                    delete(StorageSession).where(
+                        tuple_(StorageSession.app_name, StorageSession.user_id, StorageSession.id).in_(session_keys)
+                    )
+                )
+            deleted["sessions_deleted"] += len(session_keys)
+            deleted["events_deleted"] += events.rowcount
+            for _, _, session_id in session_keys:
+                self.session_databases.drop(session_id, delete_snapshot=True)
+            # let waiting writers in between two batches
+            time.sleep(settings.JANITOR_BATCH_PAUSE)
+        return deleted
+
+    def _known_session_ids(self) -> Set[str]:
+        with self.engine.connect() as connection:
+            return set(connection.execute(select(StorageSession.id)).scalars())
+
+    def purge_snapshots(self) -> Dict[str, int]:
+        """Delete SQL snapshots of deleted sessions and snapshots older than the retention"""
+        deleted = {"snapshots_deleted": 0, "bytes_reclaimed": 0}
+        snapshot_dir = self.session_databases.snapshot_dir
+        if snapshot_dir is None or not snapshot_dir.exists():
+            return deleted
+
+        now = time.time()
+        known = {self.session_databases.snapshot_path(session_id).name for session_id in self._known_session_ids()}
+        live = self.session_databases.live_files()
+        max_age = settings.SQL_SNAPSHOT_RETENTION_DAYS * 86400
+        # -wal / -shm files belong to the database file they extend and go with it
+        files: Dict[str, List[Path]] = {}
+        for path in snapshot_dir.iterdir():
+            # dotfiles hold shared state such as the page tokens
+            if not path.name.startswith("."):
+                files.setdefault(path.name.removesuffix("-wal").removesuffix("-shm"), []).append(path)
+
+        for database_name, paths in files.items():
+            # with file storage this is the live database of an open session
+            if database_name in live:
+                continue
+            try:
+                age = now - max(path.stat().st_mtime for path in paths)
+            except OSError:
+                continue
+            # leftovers of an interrupted snapshot, or a session deleted from the chat
+            orphan = database_name.endswith(".tmp") or database_name not in known
+            if (orphan and age > settings.JANITOR_GRACE_PERIOD) or (max_age and age > max_age):
+                for path in paths:
+                    size = _size(path)
+                    path.unlink(missing_ok=True)
+                    deleted["snapshots_deleted"] += 1
+                    deleted["bytes_reclaimed"] += size
+        return deleted
+
+    def purge_logs(self) -> Dict[str, int]:
+        """Delete log files older than the retention, except those still being written"""
+        deleted = {"log_files_deleted": 0, "bytes_reclaimed": 0}
+        if settings.LOG_RETENTION_DAYS <= 0 or not settings.LOG_DIR.exists():
+            return deleted
+
+        in_use = active_log_files()
+        cutoff = time.time() - settings.LOG_RETENTION_DAYS * 86400
+        for path in settings.LOG_DIR.rglob("*.log*"):
+            try:
+                if not path.is_file() or str(path.resolve()) in in_use or path.stat().st_mtime > cutoff:
+                    continue
+            except OSError:
+                continue
+            size = _size(path)
+            path.unlink(missing_ok=True)
+            deleted["log_files_deleted"] += 1
+            deleted["bytes_reclaimed"] += size
+        return deleted
+
+    def vacuum(self, force: bool = False) -> Dict[str, int]:
+        """VACUUM the SQLite session store when the interval elapsed and enough pages are free"""
+        result = {"vacuums": 0, "bytes_reclaimed": 0}
+        if self.engine.dialect.name != "sqlite":
+            return result
+        if not force and time.monotonic() - self._last_vacuum < settings.SESSION_DB_VACUUM_INTERVAL:
+            return result
+
+        with self.engine.connect() as connection:
+            page_count = connection.execute(text("PRAGMA page_count")).scalar()
+            free_pages = connection.execute(text("PRAGMA freelist_count")).scalar()
+            page_size = connection.execute(text("PRAGMA page_size")).scalar()
+        self._last_vacuum = time.monotonic()
+        if not page_count or free_pages / page_count < settings.SESSION_DB_VACUUM_FREE_RATIO:
+            return result
+
+        # VACUUM cannot run inside a transaction
+        with self.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            connection.execute(text("VACUUM"))
+            connection.execute(text("PRAGMA wal_checkpoint(TRUNCATE)"))
+        logger.info("Vacuumed the session store, %d free pages released", free_pages)
+        return {"vacuums": 1, "bytes_reclaimed": free_pages * page_size}
+
+    def run_once(self, force_vacuum: bool = False) -> Dict[str, int]:
+        """Apply every retention policy once (blocking) and return what was removed"""
+        started = time.monotonic()
+        totals: Dict[str, int] = {}
+        for step in (self.purge_sessions, self.purge_snapshots, self.purge_logs,
+                     lambda: self.vacuum(force_vacuum)):
+            try:
+                for key, value in step().items():
+                    totals[key] = totals.get(key, 0) + value
+            except Exception as e:
+                logger.error("Janitor step failed: %s", e)
+
+        self._counters["runs"] += 1
+        for key, value in totals.items():
+            self._counters[key] += value
+        self._last_run = {"timestamp": time.time(), "duration_seconds": round(time.monotonic() - started, 3), **totals}
+        if any(totals.values()):
+            logger.info("Janitor run: %s", self._last_run)
+        return totals
+
+    async def run_forever(self):
+        """Run the janitor every JANITOR_INTERVAL seconds until cancelled"""
+        while True:
+            await asyncio.sleep(settings.JANITOR_INTERVAL)
+            await asyncio.to_thread(self.run_once)
+
+    def stats(self) -> Dict:
+        """Return the totals since start-up and the figures of the last run"""
+        return {**self._counters, "last_run": dict(self._last_run)}
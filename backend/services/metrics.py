@@ -0,0 +1,269 @@
+"""Prometheus metrics of the backend, rendered in the text exposition format.
+
+A small in-process registry of counters and histograms, plus counters and
+gauges read from the ``stats()`` of the components that already track their
+own numbers (SQL executor, session databases, caches, janitor). ``GET
+/metrics`` serves ``registry.render()``.
+
+With several worker processes every sample carries a ``worker`` label and
+each worker publishes its samples to a shared directory, so whichever
+worker answers a scrape reports all of them.
+"""
+
+import bisect
+import json
+import math
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+PREFIX = "sql_teacher"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+SQL_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250, 1000, 10000)
+TOKEN_BUCKETS = (64, 256, 1024, 2048, 4096, 8192, 16384, 32768, 65536, 131072)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with labels"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+        return [f"{self.name}{_labels(self.labelnames, key)} {_number(value)}" for key, value in values.items()]
+
+    def families(self) -> List[Tuple[str, str, str, List[str]]]:
+        return [(self.name, self.documentation, self.kind, self.samples())]
+
+
+class Histogram:
+    """Histogram with fixed buckets and labels"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # per label set: observations per bucket (not cumulative), sum
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.setdefault(key, ([0] * len(self.buckets), [0.0]))
+            counts[index] += 1
+            total[0] += value
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = {key: (list(counts), total[0]) for key, (counts, total) in self._values.items()}
+        lines = []
+        for key, (counts, total) in values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+    def families(self) -> List[Tuple[str, str, str, List[str]]]:
+        return [(self.name, self.documentation, self.kind, self.samples())]
+
+
+class StatsMetrics:
+    """Counters and gauges read from a component's ``stats()`` dict when metrics are scraped.
+
+    Keys listed in ``counters`` only grow and are exported as
+    ``<name>_<key>_total`` counters, keys listed in ``gauges`` as
+    ``<name>_<key>`` gauges. Ratios are left to PromQL.
+    """
+
+    def __init__(self, name: str, documentation: str, stats: Callable[[], Dict],
+                 counters: Sequence[str] = (), gauges: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.stats = stats
+        self.counters = tuple(counters)
+        self.gauges = tuple(gauges)
+
+    def families(self) -> List[Tuple[str, str, str, List[str]]]:
+        values = self.stats()
+        families = []
+        for keys, kind, suffix in ((self.counters, "counter", "_total"), (self.gauges, "gauge", "")):
+            for key in keys:
+                if key in values:
+                    name = f"{self.name}_{key}{suffix}"
+                    families.append((name, f"{self.documentation} ({key})", kind, [f"{name} {_number(values[key])}"]))
+        return families
+
+
+def _add_label(sample: str, label: str) -> str:
+    """Add one label to a sample line"""
+    series, value = sample.rsplit(" ", 1)
+    if series.endswith("}"):
+        return f"{series[:-1]},{label}}} {value}"
+    return f"{series}{{{label}}} {value}"
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together"""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+        # set by share_across_workers()
+        self._worker: Optional[str] = None
+        self._shared_dir: Optional[Path] = None
+        self._interval = 0.0
+
+    def _register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(f"{PREFIX}_{name}", documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(f"{PREFIX}_{name}", documentation, labelnames, buckets))
+
+    def stats_metrics(self, name: str, documentation: str, stats: Callable[[], Dict],
+                      counters: Sequence[str] = (), gauges: Sequence[str] = ()) -> StatsMetrics:
+        return self._register(StatsMetrics(f"{PREFIX}_{name}", documentation, stats, counters, gauges))
+
+    def _families(self) -> Dict[str, Dict]:
+        """Metric families of this process, by name"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        families = {}
+        for metric in metrics:
+            for name, documentation, kind, samples in metric.families():
+                if self._worker is not None:
+                    samples = [_add_label(sample, f'worker="{self._worker}"') for sample in samples]
+                families[name] = {"help": documentation, "type": kind, "samples": samples}
+        return families
+
+    def share_across_workers(self, directory, interval: float):
+        """Label samples with the process id and publish them to ``directory`` every ``interval`` seconds"""
+        self._worker = str(os.getpid())
+        self._shared_dir = Path(directory)
+        self._shared_dir.mkdir(parents=True, exist_ok=True)
+        self._interval = interval
+        threading.Thread(target=self._publish_forever, name="metrics-publisher", daemon=True).start()
+
+    def _publish(self, families: Dict[str, Dict]):
+        path = self._shared_dir / f"{self._worker}.json"
+        temporary = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        temporary.write_text(json.dumps(families))
+        os.replace(temporary, path)
+
+    def _publish_forever(self):
+        while True:
+            try:
+                self._publish(self._families())
+            except Exception:
+                # retried on the next tick; a worker that stays silent drops out of the scrapes
+                pass
+            time.sleep(self._interval)
+
+    def _other_workers(self) -> List[Dict[str, Dict]]:
+        """Families published by the other live workers; files of workers gone silent are removed"""
+        others = []
+        for path in self._shared_dir.glob("*.json"):
+            if path.stem == self._worker:
+                continue
+            try:
+                if time.time() - path.stat().st_mtime > 3 * self._interval:
+                    path.unlink(missing_ok=True)
+                    continue
+                others.append(json.loads(path.read_text()))
+            except (OSError, ValueError):
+                continue
+        return others
+
+    def render(self) -> str:
+        """Return every metric in the Prometheus text format"""
+        families = self._families()
+        if self._shared_dir is not None:
+            for other in self._other_workers():
+                for name, family in other.items():
+                    families.setdefault(name, {**family, "samples": []})["samples"] += family["samples"]
+        lines = []
+        for name, family in families.items():
+            lines.append(f"# HELP {name} {family['help']}")
+            lines.append(f"# TYPE {name} {family['type']}")
+            lines.extend(family["samples"])
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "http_request_duration_seconds", "Time to answer an HTTP request (to the first byte for streams)",
+    ("method", "route", "status"),
+)
+LLM_REQUEST_SECONDS = registry.histogram(
+    "llm_request_duration_seconds", "Duration of a model call, per agent", ("agent",),
+)
+LLM_TOKENS = registry.histogram(
+    "llm_request_tokens", "Tokens of a model call, per agent and kind (prompt or completion)",
+    ("agent", "kind"), TOKEN_BUCKETS,
+)
+LLM_TOKENS_TOTAL = registry.counter(
+    "llm_tokens_total", "Tokens used, per agent and kind (prompt or completion)", ("agent", "kind"),
+)
+TOOL_CALL_SECONDS = registry.histogram(
+    "tool_call_duration_seconds", "Duration of a tool call, per agent and tool", ("agent", "tool"),
+)
+AGENT_RUN_TOOL_CALLS = registry.histogram(
+    "agent_run_tool_calls", "Tool calls made during one run of an agent", ("agent",), COUNT_BUCKETS,
+)
+SQL_SECONDS = registry.histogram(
+    "sql_execution_duration_seconds", "Time spent executing SQL, per kind (statement or script) and outcome",
+    ("kind", "outcome"), SQL_BUCKETS,
+)
+SQL_ROWS = registry.histogram(
+    "sql_rows_returned", "Rows returned to the agent by one query", (), COUNT_BUCKETS,
+)
@@ -0,0 +1,67 @@
+"""HTTP middleware of the backend app"""
+
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from opentelemetry.trace import Status, StatusCode
+
+from backend.services.metrics import HTTP_REQUEST_SECONDS
+from backend.services.tracing import TRACED_ROUTES, request_span, tracer
+from logging_data.logging_config import correlation_id
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+
+def register_middleware(app: FastAPI):
+    """Add the sql_teacher specific middleware to the app"""
+
+    @app.middleware("http")
+    async def trace_request(request: Request, call_next):
+        """Open a span around every agent run request"""
+        if request.url.path not in TRACED_ROUTES:
+            return await call_next(request)
+
+        with tracer.start_as_current_span(f"{request.method} {request.url.path}") as span:
+            span.set_attribute("http.request.method", request.method)
+            span.set_attribute("http.route", request.url.path)
+            span.set_attribute("sql_teacher.correlation_id", correlation_id.get())
+            token = request_span.set(span)
+            try:
+                response = await call_next(request)
+            finally:
+                request_span.reset(token)
+            span.set_attribute("http.response.status_code", response.status_code)
+            if response.status_code >= 500:
+                span.set_status(Status(StatusCode.ERROR))
+            return response
+
+    @app.middleware("http")
+    async def time_request(request: Request, call_next):
+        """Record the latency of every request, labelled with its route template"""
+        started = time.perf_counter()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            route = request.scope.get("route")
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - started,
+                method=request.method,
+                route=getattr(route, "path", "unmatched"),
+                status=status,
+            )
+
+    @app.middleware("http")
+    async def bind_correlation_id(request: Request, call_next):
+        """Tag the logs of a request with the id the client sent, or a new one"""
+        request_id = request.headers.get(REQUEST_ID_HEADER) or uuid.uuid4().hex[:16]
+        token = correlation_id.set(request_id)
+        try:
+            response = await call_next(request)
+        finally:
+            correlation_id.reset(token)
+        response.headers[REQUEST_ID_HEADER] = request_id
+        return response
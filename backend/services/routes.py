@@ -0,0 +1,45 @@
+"""Extra endpoints mounted next to the ones of the ADK FastAPI app"""
+
+from typing import Dict, List, Optional
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse
+from google.adk.sessions import BaseSessionService
+from google.adk.sessions.base_session_service import GetSessionConfig
+
+from backend.services.metrics import registry
+from backend.services.session_summaries import list_session_summaries
+
+
+def register_routes(app: FastAPI, session_service: BaseSessionService):
+    """Add the sql_teacher specific endpoints to the app"""
+
+    @app.get("/metrics", response_class=PlainTextResponse)
+    async def get_metrics() -> str:
+        """Metrics in the Prometheus text exposition format"""
+        return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+    @app.get("/apps/{app_name}/users/{user_id}/session-summaries")
+    async def get_session_summaries(app_name: str, user_id: str) -> List[Dict]:
+        return await list_session_summaries(session_service, app_name, user_id)
+
+    @app.get("/apps/{app_name}/users/{user_id}/sessions/{session_id}/events")
+    async def get_session_events(app_name: str, user_id: str, session_id: str,
+                                 after: Optional[float] = None, after_event_id: Optional[str] = None) -> Dict:
+        """Events of a session newer than the last one the client has seen"""
+        config = GetSessionConfig(after_timestamp=after) if after else None
+        session = await session_service.get_session(
+            app_name=app_name, user_id=user_id, session_id=session_id, config=config
+        )
+        if session is None:
+            raise HTTPException(status_code=404, detail="Session not found")
+
+        events = session.events
+        # the timestamp filter is inclusive, so skip what the client already has
+        seen = [index for index, event in enumerate(events) if event.id == after_event_id]
+        if seen:
+            events = events[seen[0] + 1:]
+        return {
+            "events": [event.model_dump(mode="json", exclude_none=True, by_alias=True) for event in events],
+            "lastUpdateTime": session.last_update_time,
+        }
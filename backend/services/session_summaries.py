@@ -0,0 +1,83 @@
+"""Lightweight session listing for the frontend sidebar.
+
+The root agent keeps a title and a turn counter in the session state, so the
+sidebar can list sessions without downloading their event histories.
+"""
+
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from google.adk.sessions import BaseSessionService
+
+from logging_data.logging_config import get_backend_logger
+
+logger = get_backend_logger(__name__)
+
+SESSION_TITLE_KEY = "session_title"
+TURN_COUNT_KEY = "turn_count"
+TITLE_LENGTH = 80
+# summaries of sessions older than the summary state, by session id
+_BACKFILL_CACHE_SIZE = 1024
+_backfilled: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+
+
+def first_user_text(events) -> Optional[str]:
+    """Return the text of the first user message among the events"""
+    for event in events:
+        if event.author == "user" and event.content and event.content.parts:
+            text = "".join(part.text or "" for part in event.content.parts).strip()
+            if text:
+                return text
+    return None
+
+
+def summarize_events(events) -> Dict:
+    """Title and turn count of a session, computed from its events"""
+    return {
+        SESSION_TITLE_KEY: (first_user_text(events) or "")[:TITLE_LENGTH],
+        TURN_COUNT_KEY: sum(
+            1 for event in events
+            if event.author == "user" and event.content and any(part.text for part in event.content.parts or [])
+        ),
+    }
+
+
+async def _backfill(session_service: BaseSessionService, app_name: str, user_id: str, session_id: str,
+                    last_update_time: float) -> Dict:
+    """Compute the summary of a session created before the summary existed.
+
+    Nothing is written to the session, so its update time and history stay
+    as they are; the root agent stores the summary on the next turn. The
+    result is kept until the session changes.
+    """
+    cached = _backfilled.get(session_id)
+    if cached is not None and cached[0] == last_update_time:
+        _backfilled.move_to_end(session_id)
+        return cached[1]
+    session = await session_service.get_session(app_name=app_name, user_id=user_id, session_id=session_id)
+    if session is None:
+        return {}
+    summary = summarize_events(session.events)
+    _backfilled[session_id] = (last_update_time, summary)
+    while len(_backfilled) > _BACKFILL_CACHE_SIZE:
+        _backfilled.popitem(last=False)
+    logger.info("Backfilled summary of session %s", session_id)
+    return summary
+
+
+async def list_session_summaries(session_service: BaseSessionService, app_name: str, user_id: str) -> List[Dict]:
+    """Return id, title, last update time and turn count of every session, newest first"""
+    response = await session_service.list_sessions(app_name=app_name, user_id=user_id)
+    summaries = []
+    for session in response.sessions:
+        state = session.state
+        if SESSION_TITLE_KEY not in state:
+            state = await _backfill(session_service, app_name, user_id, session.id, session.last_update_time)
+        summaries.append({
+            "id": session.id,
+            "title": state.get(SESSION_TITLE_KEY) or None,
+            "last_updated": session.last_update_time,
+            "turn_count": state.get(TURN_COUNT_KEY, 0),
+        })
+    summaries.sort(key=lambda summary: summary["last_updated"], reverse=True)
+    return summaries
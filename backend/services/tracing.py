@@ -0,0 +1,93 @@
+"""OpenTelemetry tracing of agent runs, exported to the console or a local OTLP collector.
+
+The ADK app already installs a global ``TracerProvider`` and creates spans for
+every invocation, agent run, model call and tool call (``AgentTool``
+delegations included). ``setup_tracing`` adds an exporter to that provider;
+this module adds spans for the ``/run`` requests and for every SQL statement
+and tags them with the id of the conversation.
+"""
+
+import contextvars
+import functools
+from typing import Callable, Dict, Optional
+
+from opentelemetry import trace
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+from opentelemetry.trace import Status, StatusCode
+
+from settings import settings
+from logging_data.logging_config import get_backend_logger
+
+logger = get_backend_logger(__name__)
+
+SESSION_ID_ATTRIBUTE = "sql_teacher.session_id"
+# requests traced as a whole; other endpoints are cheap and not worth a span
+TRACED_ROUTES = ("/run", "/run_sse")
+
+tracer = trace.get_tracer("sql_teacher")
+
+# span of the HTTP request being served, so that callbacks deep in the agent
+# run can tag it with the session id
+request_span: contextvars.ContextVar[Optional[trace.Span]] = contextvars.ContextVar("request_span", default=None)
+
+
+def _otlp_exporter():
+    try:
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+    except ImportError:
+        try:
+            from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+        except ImportError:
+            logger.warning("TRACING_EXPORTER=otlp needs opentelemetry-exporter-otlp, tracing is not exported")
+            return None
+    # the endpoint comes from OTEL_EXPORTER_OTLP_ENDPOINT (a local collector by default)
+    return OTLPSpanExporter()
+
+
+def setup_tracing():
+    """Send the spans of the ADK tracer provider to the configured exporter"""
+    if settings.TRACING_EXPORTER == "none":
+        return
+    provider = trace.get_tracer_provider()
+    if not isinstance(provider, TracerProvider):
+        logger.warning("No OpenTelemetry SDK tracer provider installed, tracing is not exported")
+        return
+
+    exporter = ConsoleSpanExporter() if settings.TRACING_EXPORTER == "console" else _otlp_exporter()
+    if exporter is None:
+        return
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    logger.info("Exporting traces with the %s exporter", settings.TRACING_EXPORTER)
+
+
+def tag_session(session_id: str):
+    """Record the conversation id on the current span and on the request span"""
+    trace.get_current_span().set_attribute(SESSION_ID_ATTRIBUTE, session_id)
+    span = request_span.get()
+    if span is not None:
+        span.set_attribute(SESSION_ID_ATTRIBUTE, session_id)
+
+
+def traced_sql(kind: str) -> Callable:
+    """Decorate ``func(session_id, sql, ...)`` returning a tool result dict to run it in a span"""
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(session_id: str, sql: str, *args) -> Dict:
+            with tracer.start_as_current_span(f"sql {kind}") as span:
+                span.set_attribute(SESSION_ID_ATTRIBUTE, session_id)
+                span.set_attribute("db.system", "sqlite")
+                span.set_attribute("db.statement", sql[:settings.TRACING_MAX_STATEMENT_CHARS])
+                result = func(session_id, sql, *args)
+                if result.get("response") == "error":
+                    span.set_status(Status(StatusCode.ERROR, str(result.get("details"))))
+                if "rows" in result:
+                    span.set_attribute("db.rows_returned", len(result["rows"]))
+                if "results" in result:
+                    span.set_attribute("db.statements", len(result["results"]))
+                return result
+
+        return wrapper
+
+    return decorator
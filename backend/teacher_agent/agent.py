@@ -1,9 +1,19 @@
 from google.adk.agents import LlmAgent
 from google.adk.tools import AgentTool
 from backend.teacher_agent.prompt import ROOT_INSTRUCTIONS
+from backend.teacher_agent.callbacks import (
+    bind_sql_session, inject_schema_digest, sync_schema_digest, track_session_summary,
+)
+from backend.teacher_agent.compaction import compact_history
+from backend.teacher_agent.context_cache import use_context_cache
+from backend.teacher_agent.fast_path import sql_fast_path
+from backend.teacher_agent.instrumentation import (
+    record_agent_run, record_model_call, record_tool_call, start_model_timer, start_tool_timer,
+)
 from backend.teacher_agent.sub_agents.schema_designer_agent.agent import schema_designer_agent
 from backend.teacher_agent.sub_agents.memory_agent.agent import memory_agent
 from backend.teacher_agent.sub_agents.quiz_agent.agent import quiz_agent
+from backend.teacher_agent.sub_agents.query_explainer_agent.agent import query_explainer_agent
 
 
 root_agent = LlmAgent(
@@ -15,6 +25,13 @@ root_agent = LlmAgent(
         AgentTool(schema_designer_agent),
         AgentTool(memory_agent),
         AgentTool(quiz_agent),
+        AgentTool(query_explainer_agent),
     ],
+    before_agent_callback=[bind_sql_session, track_session_summary, sql_fast_path, sync_schema_digest],
+    after_agent_callback=record_agent_run,
+    before_model_callback=[compact_history, inject_schema_digest, start_model_timer, use_context_cache],
+    after_model_callback=record_model_call,
+    before_tool_callback=start_tool_timer,
+    after_tool_callback=record_tool_call,
 
 )
\ No newline at end of file
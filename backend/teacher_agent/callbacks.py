@@ -0,0 +1,143 @@
+"""Callbacks attached to the root agent (teacher_agent)"""
+
+import re
+from typing import Any, Dict, Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest, LlmResponse
+from google.adk.tools import BaseTool, ToolContext
+from google.genai import types
+from backend.services.tracing import tag_session
+from backend.tools.db_connector import check_syntax, get_sql_session_id, schema_digest, split_script
+from backend.tools.query_plan import explain_plan, find_sql, walk_steps
+from backend.tools.schema_digest import SCHEMA_DIGEST_KEY
+from backend.tools.session_db import SQL_SESSION_KEY, DatabaseBusyError
+from backend.tools.sql_executor import SqlBackendBusyError, sql_executor
+from backend.teacher_agent.fast_path import AWAITING_QUIZ_ANSWER_KEY
+from backend.services.session_summaries import SESSION_TITLE_KEY, TITLE_LENGTH, TURN_COUNT_KEY, summarize_events
+from settings import settings
+from logging_data.logging_config import get_backend_logger
+
+logger = get_backend_logger(__name__)
+
+# output key of the quiz agent, holding its last reply
+QUIZ_RESPONSE_KEY = "quiz_response"
+# first line of a reply that asks quiz questions
+_QUIZ_HEADING = re.compile(r"^\s*#+\s*Quiz\s*$", re.IGNORECASE | re.MULTILINE)
+_ASKS_FOR_INDEXES = re.compile(r"\bindex(es)?\b|\bindices\b", re.IGNORECASE)
+# plan steps that make a query slow as the data grows
+_SLOW_STEPS = ("full_scan", "automatic_index", "temp_btree")
+
+
+def bind_sql_session(callback_context: CallbackContext):
+    """Pin the conversation's session id in state.
+
+    Sub-agents called through AgentTool run in a fresh in-memory session that
+    only inherits the parent state, so db_interactions reads this key to find
+    the database of the conversation it is working for.
+    """
+    session_id = callback_context._invocation_context.session.id
+    tag_session(session_id)
+    if callback_context.state.get(SQL_SESSION_KEY) != session_id:
+        callback_context.state[SQL_SESSION_KEY] = session_id
+
+
+def track_session_summary(callback_context: CallbackContext):
+    """Keep the title and turn count the session listing shows up to date"""
+    user_content = callback_context.user_content
+    text = "".join(part.text or "" for part in user_content.parts or []).strip() if user_content else ""
+    if not text:
+        return
+    if SESSION_TITLE_KEY not in callback_context.state:
+        # first turn, or a session older than the summary: its events (this message included) tell
+        summary = summarize_events(callback_context._invocation_context.session.events)
+        callback_context.state[SESSION_TITLE_KEY] = summary[SESSION_TITLE_KEY] or text[:TITLE_LENGTH]
+        callback_context.state[TURN_COUNT_KEY] = max(summary[TURN_COUNT_KEY], 1)
+        return
+    callback_context.state[TURN_COUNT_KEY] = callback_context.state.get(TURN_COUNT_KEY, 0) + 1
+
+
+def mark_quiz_pending(callback_context: CallbackContext):
+    """Make sure the user's next message (likely a quiz answer) reaches the model.
+
+    Only a reply that asks questions opens the heading QUIZ_INSTRUCTIONS asks
+    for; grading an answer or chatting leaves the fast path on.
+    """
+    if _QUIZ_HEADING.match(callback_context.state.get(QUIZ_RESPONSE_KEY) or ""):
+        callback_context.state[AWAITING_QUIZ_ANSWER_KEY] = True
+
+
+async def sync_schema_digest(callback_context: CallbackContext):
+    """Put the schema digest of the conversation's database in state at the start of a turn"""
+    session_id = callback_context.state.get(SQL_SESSION_KEY) or callback_context._invocation_context.session.id
+    try:
+        digest = await sql_executor.run(schema_digest, session_id)
+    except SqlBackendBusyError:
+        return
+    if callback_context.state.get(SCHEMA_DIGEST_KEY) != digest:
+        callback_context.state[SCHEMA_DIGEST_KEY] = digest
+
+
+def inject_schema_digest(callback_context: CallbackContext, llm_request: LlmRequest) -> Optional[LlmResponse]:
+    """before_model_callback giving the model the current schema ahead of the conversation.
+
+    The digest goes into the contents rather than the instruction, so the
+    instruction stays the same for every session and can be cached.
+    """
+    digest = callback_context.state.get(SCHEMA_DIGEST_KEY)
+    if digest is None:
+        return None
+    text = f"Current schema of the student's database (tables, columns, row counts):\n{digest or '(no tables yet)'}"
+    llm_request.contents.insert(0, types.Content(role="user", parts=[types.Part(text=text)]))
+    return None
+
+
+async def plan_before_narrating(callback_context: CallbackContext, llm_request: LlmRequest) -> Optional[LlmResponse]:
+    """before_model_callback calling explain_query_plan directly when the request contains a query.
+
+    Requests about indexes call advise_indexes instead, with timings. The
+    model is only called once the tool has answered, to turn it into prose.
+    A request whose SQL does not compile (usually prose) goes to the model.
+    """
+    last = llm_request.contents[-1] if llm_request.contents else None
+    if last is None or last.role != "user" or any(part.function_response for part in last.parts or []):
+        return None
+    text = " ".join(part.text for part in last.parts or [] if part.text)
+    sql = find_sql(text)
+    if sql is None or len(split_script(sql)) != 1:
+        return None
+    session_id = callback_context.state.get(SQL_SESSION_KEY) or callback_context._invocation_context.session.id
+    try:
+        if not await sql_executor.run(check_syntax, session_id, [sql]):
+            return None
+    except (SqlBackendBusyError, DatabaseBusyError):
+        return None
+    if _ASKS_FOR_INDEXES.search(text.replace(sql, "")):
+        call = types.FunctionCall(name="advise_indexes", args={"sql_query": sql, "measure": True})
+    else:
+        call = types.FunctionCall(name="explain_query_plan", args={"sql_query": sql})
+    return LlmResponse(content=types.Content(role="model", parts=[types.Part(function_call=call)]))
+
+
+async def flag_slow_query(tool: BaseTool, args: Dict[str, Any], tool_context: ToolContext,
+                          tool_response: Dict) -> Optional[Dict]:
+    """after_tool_callback adding a performance hint to the result of a slow query"""
+    if tool.name != "db_interactions" or not isinstance(tool_response, dict):
+        return None
+    duration_ms = tool_response.get("duration_ms", 0)
+    if duration_ms < settings.SQL_SLOW_QUERY_MS:
+        return None
+    session_id = get_sql_session_id(tool_context)
+    logger.warning("Slow query in session %s (%.0f ms): %s", session_id, duration_ms, args.get("sql_command"))
+    try:
+        plan = await sql_executor.run(explain_plan, session_id, args.get("sql_command", ""))
+    except SqlBackendBusyError:
+        return None
+    causes = [step["detail"] for step in walk_steps(plan.get("plan", [])) if step["operation"] in _SLOW_STEPS]
+    if not causes:
+        return None
+    tool_response["performance_hint"] = (
+        f"This query took {duration_ms:.0f} ms because of: {'; '.join(causes)}. "
+        "The query_explainer_agent can propose an index for it."
+    )
+    return tool_response
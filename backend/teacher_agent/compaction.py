@@ -0,0 +1,132 @@
+"""History compaction for long conversations with the root agent.
+
+ADK replays every event of a session into the model request, so prompt tokens
+grow with each turn. A ``before_model_callback`` keeps the last
+``COMPACTION_KEEP_TURNS`` turns verbatim and replaces everything older with a
+running summary kept in session state. The summary is extended in batches of
+``COMPACTION_BATCH_TURNS`` turns, so the summarizer runs once every few turns
+and the context sent to Gemini stays bounded.
+"""
+
+import json
+from typing import List, Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest, LlmResponse
+from google.genai import types
+
+from settings import settings
+from logging_data.logging_config import get_backend_logger
+
+logger = get_backend_logger(__name__)
+
+# running summary of the compacted turns and how many turns it covers
+SUMMARY_KEY = "conversation_summary"
+SUMMARIZED_TURNS_KEY = "conversation_summarized_turns"
+
+_SUMMARY_PROMPT = """You maintain the memory of a SQL tutoring conversation between a student and a teacher.
+Update the summary below with the new turns. Keep: the topics covered, the tables the student designed,
+the quiz questions asked with the student's answers and whether they were right, recurring mistakes and
+anything the student asked to remember. Drop greetings and full query results. Answer with the updated
+summary only, at most {max_chars} characters.
+
+Current summary:
+{summary}
+
+New turns:
+{turns}"""
+
+_client = None
+
+
+def split_turns(contents: List[types.Content]) -> List[List[types.Content]]:
+    """Group request contents into turns, each starting with a message typed by the user"""
+    turns = []
+    for content in contents:
+        parts = content.parts or []
+        starts_turn = content.role == "user" and any(part.text for part in parts) \
+            and not any(part.function_response for part in parts)
+        if starts_turn or not turns:
+            turns.append([])
+        turns[-1].append(content)
+    return turns
+
+
+def _render_turns(turns: List[List[types.Content]]) -> str:
+    """Write turns as plain text for the summarizer, shortening tool payloads"""
+    limit = settings.COMPACTION_TOOL_CHARS
+    lines = []
+    for turn in turns:
+        for content in turn:
+            speaker = "Student" if content.role == "user" else "Teacher"
+            for part in content.parts or []:
+                if part.text and not part.thought:
+                    lines.append(f"{speaker}: {part.text}")
+                elif part.function_call:
+                    args = json.dumps(part.function_call.args, default=str)[:limit]
+                    lines.append(f"Teacher called {part.function_call.name}: {args}")
+                elif part.function_response:
+                    response = json.dumps(part.function_response.response, default=str)[:limit]
+                    lines.append(f"{part.function_response.name} returned: {response}")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def _fallback_summary(summary: str, turns: List[List[types.Content]]) -> str:
+    """Summary used when the summarizer is unavailable: the student messages, shortened"""
+    questions = []
+    for turn in turns:
+        text = " ".join(part.text for part in turn[0].parts or [] if part.text)
+        questions.append(f"- Student asked: {' '.join(text.split())[:200]}")
+    summary = "\n".join(filter(None, [summary, *questions]))
+    return summary[-settings.COMPACTION_SUMMARY_CHARS:]
+
+
+async def summarize(summary: str, turns: List[List[types.Content]]) -> str:
+    """Fold the given turns into the running summary with a model call"""
+    global _client
+    prompt = _SUMMARY_PROMPT.format(
+        max_chars=settings.COMPACTION_SUMMARY_CHARS,
+        summary=summary or "(empty)",
+        turns=_render_turns(turns),
+    )
+    try:
+        if _client is None:
+            from google import genai
+
+            _client = genai.Client()
+        response = await _client.aio.models.generate_content(model=settings.COMPACTION_MODEL, contents=prompt)
+        if response.text:
+            return response.text.strip()[:settings.COMPACTION_SUMMARY_CHARS]
+    except Exception as e:
+        logger.warning("Could not summarize the conversation, keeping the student messages: %s", e)
+    return _fallback_summary(summary, turns)
+
+
+async def compact_history(callback_context: CallbackContext, llm_request: LlmRequest) -> Optional[LlmResponse]:
+    """before_model_callback replacing old turns with a summary"""
+    if not settings.COMPACTION_ENABLED:
+        return None
+
+    turns = split_turns(llm_request.contents)
+    state = callback_context.state
+    summarized = min(state.get(SUMMARIZED_TURNS_KEY, 0), len(turns))
+    summary = state.get(SUMMARY_KEY, "")
+
+    keep = settings.COMPACTION_KEEP_TURNS
+    if len(turns) - summarized > keep + settings.COMPACTION_BATCH_TURNS:
+        boundary = len(turns) - keep
+        summary = await summarize(summary, turns[summarized:boundary])
+        summarized = boundary
+        state[SUMMARY_KEY] = summary
+        state[SUMMARIZED_TURNS_KEY] = summarized
+        logger.info("Compacted %d turns of session %s", summarized, callback_context._invocation_context.session.id)
+
+    if not summarized:
+        return None
+
+    # the current schema is added by inject_schema_digest
+    text = f"Summary of the earlier conversation (older messages are not shown):\n{summary}"
+    recent = [content for turn in turns[summarized:] for content in turn]
+    llm_request.contents = [types.Content(role="user", parts=[types.Part(text=text)]), *recent]
+    return None
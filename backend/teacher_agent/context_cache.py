@@ -0,0 +1,142 @@
+"""Context caching of the static prefix of agent requests.
+
+Every model call re-sends the system instruction and the tool declarations of
+the agent, which do not change between calls. When enabled, the prefix is
+stored once per model with the Gemini ``CachedContent`` API and the requests
+reference it instead of re-sending it, so those input tokens are billed at the
+cached rate. The cache is created in the background on the first call with a
+new prefix; that call (and any racing it) is sent in full. Prefixes below
+``CONTEXT_CACHE_MIN_TOKENS`` are left alone, the API refuses to cache them.
+"""
+
+import asyncio
+import hashlib
+import threading
+import time
+from typing import Dict, Optional, Set, Tuple
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest, LlmResponse
+from google.genai import types
+
+from settings import settings
+from logging_data.logging_config import get_backend_logger
+
+logger = get_backend_logger(__name__)
+
+# a cache is replaced this long before it expires, so requests never reference an expired one
+_REFRESH_MARGIN = 120  # seconds
+_CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count of a text, when the count_tokens API is not worth a call"""
+    return len(text) // _CHARS_PER_TOKEN + 1 if text else 0
+
+
+def prefix_text(config: types.GenerateContentConfig) -> str:
+    """The static part of a request: system instruction, tool declarations and tool config"""
+    parts = [str(config.system_instruction or "")]
+    parts += [tool.model_dump_json(exclude_none=True) for tool in config.tools or [] if isinstance(tool, types.Tool)]
+    if config.tool_config is not None:
+        parts.append(config.tool_config.model_dump_json(exclude_none=True))
+    return "\n".join(parts)
+
+
+class ContextCache:
+    """Names of the ``CachedContent`` holding each (model, prefix), created on demand"""
+
+    def __init__(self, ttl: int, min_tokens: int):
+        self.ttl = ttl
+        self.min_tokens = min_tokens
+        # (model, prefix hash) -> (cache name or None when creation failed, expiry as monotonic time)
+        self._entries: Dict[Tuple[str, str], Tuple[Optional[str], float]] = {}
+        self._creating: Set[Tuple[str, str]] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self._lock = threading.Lock()
+        self._client = None
+        self._counters = {"hits": 0, "misses": 0, "too_small": 0, "created": 0, "failures": 0}
+
+    def _lookup(self, key: Tuple[str, str]) -> Tuple[Optional[str], bool]:
+        """Return the cache name to use, and whether a new cache must be created"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() < entry[1]:
+                self._counters["hits" if entry[0] else "misses"] += 1
+                return entry[0], False
+            self._counters["misses"] += 1
+            if key in self._creating:
+                return None, False
+            self._creating.add(key)
+            return None, True
+
+    async def _create(self, key: Tuple[str, str], model: str, config: types.GenerateContentConfig):
+        name = None
+        try:
+            if self._client is None:
+                from google import genai
+
+                self._client = genai.Client()
+            cached = await self._client.aio.caches.create(
+                model=model,
+                config=types.CreateCachedContentConfig(
+                    display_name=f"sql_teacher-{key[1][:16]}",
+                    system_instruction=config.system_instruction,
+                    tools=config.tools,
+                    tool_config=config.tool_config,
+                    ttl=f"{self.ttl}s",
+                ),
+            )
+            name = cached.name
+            logger.info("Created context cache %s for %s", name, model)
+        except Exception as e:
+            # do not retry on every call, the prefix is probably not cacheable
+            logger.warning("Could not create a context cache for %s: %s", model, e)
+        with self._lock:
+            self._creating.discard(key)
+            self._counters["created" if name else "failures"] += 1
+            self._entries[key] = (name, time.monotonic() + max(self.ttl - _REFRESH_MARGIN, 0))
+
+    async def before_model(self, callback_context: CallbackContext, llm_request: LlmRequest) -> None:
+        """Point the request at the cached prefix, or start caching it"""
+        config = llm_request.config
+        if config is None or config.cached_content or not llm_request.model:
+            return None
+        text = prefix_text(config)
+        if estimate_tokens(text) < self.min_tokens:
+            with self._lock:
+                self._counters["too_small"] += 1
+            return None
+
+        key = (llm_request.model, hashlib.sha256(text.encode()).hexdigest())
+        name, create = self._lookup(key)
+        if create:
+            task = asyncio.create_task(self._create(key, llm_request.model, config.model_copy(deep=True)))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        if name is not None:
+            # the API rejects requests repeating what the cache holds
+            config.cached_content = name
+            config.system_instruction = None
+            config.tools = None
+            config.tool_config = None
+        return None
+
+    def stats(self) -> Dict[str, float]:
+        """Return hit/miss counters and the hit rate"""
+        with self._lock:
+            stats = dict(self._counters)
+            stats["entries"] = sum(1 for name, _ in self._entries.values() if name)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+context_cache = ContextCache(ttl=settings.CONTEXT_CACHE_TTL, min_tokens=settings.CONTEXT_CACHE_MIN_TOKENS)
+
+
+async def use_context_cache(callback_context: CallbackContext, llm_request: LlmRequest) -> Optional[LlmResponse]:
+    """before_model_callback sending the static prefix of the request from the context cache"""
+    if not settings.CONTEXT_CACHE_ENABLED:
+        return None
+    return await context_cache.before_model(callback_context, llm_request)
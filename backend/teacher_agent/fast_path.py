@@ -0,0 +1,169 @@
+"""Deterministic fast path that runs plain SQL messages without calling the model"""
+
+import re
+import sqlite3
+from typing import List, Optional
+
+import sqlparse
+from google.adk.agents.callback_context import CallbackContext
+from google.genai import types
+
+from backend.tools.db_connector import check_syntax, execute_script, execute_sql, publish_schema_digest, split_script
+from backend.tools.query_plan import explain_plan
+from backend.tools.session_db import SQL_SESSION_KEY
+from backend.tools.sql_executor import SqlBackendBusyError, sql_executor
+from settings import settings
+from logging_data.logging_config import get_backend_logger
+
+logger = get_backend_logger(__name__)
+
+# set by the quiz agent: the next message is probably an answer that must be graded
+AWAITING_QUIZ_ANSWER_KEY = "awaiting_quiz_answer"
+
+_SQL_KEYWORDS = {
+    "SELECT", "WITH", "VALUES", "INSERT", "REPLACE", "UPDATE", "DELETE",
+    "CREATE", "DROP", "ALTER", "PRAGMA", "EXPLAIN",
+}
+_CODE_FENCE = re.compile(r"^```(?:sql)?\s*(.*?)\s*```$", re.DOTALL | re.IGNORECASE)
+_EXPLAIN_QUERY_PLAN = re.compile(r"^\s*EXPLAIN\s+QUERY\s+PLAN\b", re.IGNORECASE)
+
+
+def extract_sql(text: str) -> Optional[List[str]]:
+    """Return the statements of a message made only of SQL, or None for anything else"""
+
+    text = text.strip()
+    fenced = _CODE_FENCE.match(text)
+    if fenced:
+        text = fenced.group(1)
+    if not text:
+        return None
+    if not text.endswith(";"):
+        text += ";"
+    if not sqlite3.complete_statement(text):
+        return None
+
+    statements = split_script(text)
+    for statement in statements:
+        first = sqlparse.parse(statement)[0].token_first(skip_cm=True)
+        if first is None or first.normalized not in _SQL_KEYWORDS:
+            return None
+    return statements
+
+
+def _format_value(value) -> str:
+    if value is None:
+        return "NULL"
+    return str(value).replace("|", "\\|").replace("\n", " ")
+
+
+def _format_rows(columns, rows) -> str:
+    lines = [
+        "| " + " | ".join(_format_value(column) for column in columns) + " |",
+        "|" + "---|" * len(columns),
+    ]
+    lines += ["| " + " | ".join(_format_value(value) for value in row) + " |" for row in rows]
+    return "\n".join(lines)
+
+
+def format_result(sql: str, result: dict) -> str:
+    """Render the result of execute_sql / execute_script as markdown for the chat"""
+
+    parts = [f"```sql\n{sql}\n```"]
+    if result["response"] == "error":
+        parts.append(f"**Error:** {result['details']}")
+        return "\n\n".join(parts)
+
+    if "results" in result:
+        for index, statement in enumerate(result["results"], start=1):
+            if "columns" in statement:
+                parts.append(f"**Statement {index}** returned:\n\n" + _format_rows(statement["columns"], statement["rows"]))
+            elif statement.get("rows_affected", -1) >= 0:
+                parts.append(f"**Statement {index}**: {statement['response']}, {statement['rows_affected']} row(s) affected")
+            else:
+                parts.append(f"**Statement {index}**: {statement['response']}")
+        parts.append(result["response"].capitalize() + ".")
+    elif "columns" in result:
+        if result["rows"]:
+            parts.append(_format_rows(result["columns"], result["rows"]))
+        else:
+            parts.append("The query returned no rows.")
+        if result["truncated"]:
+            approximate = "" if result["total_rows_exact"] else "at least "
+            parts.append(
+                f"_Showing the first {len(result['rows'])} of {approximate}{result['total_rows_estimate']} rows. "
+                "Ask me if you want to see more._"
+            )
+        if result.get("duration_ms", 0) >= settings.SQL_SLOW_QUERY_MS:
+            parts.append(
+                f"_This query took {result['duration_ms']:.0f} ms. Ask me which index would make it faster._"
+            )
+    else:
+        parts.append("Command executed successfully.")
+    return "\n\n".join(parts)
+
+
+def _format_steps(steps, depth=0):
+    lines = []
+    for step in steps:
+        lines.append(f"{'  ' * depth}- `{step['detail']}`")
+        lines += _format_steps(step["children"], depth + 1)
+    return lines
+
+
+def format_plan(sql: str, result: dict) -> str:
+    """Render the result of explain_plan as markdown for the chat"""
+
+    parts = [f"```sql\n{sql}\n```"]
+    if result["response"] == "error":
+        parts.append(f"**Error:** {result['details']}")
+        return "\n\n".join(parts)
+
+    parts.append("**Query plan** (the statement was not run):\n" + "\n".join(_format_steps(result["plan"])))
+    if len(result["join_order"]) > 1:
+        parts.append("**Join order** (outer loop first): " + " → ".join(result["join_order"]))
+    if result["findings"]:
+        parts.append("**Findings**\n" + "\n".join(f"- {finding}" for finding in result["findings"]))
+    return "\n\n".join(parts)
+
+
+async def sql_fast_path(callback_context: CallbackContext) -> Optional[types.Content]:
+    """Run a message made only of SQL directly against the session database.
+
+    Returning content from a before_agent_callback ends the turn without a
+    model call. Anything that is not plain SQL (or a quiz answer) falls
+    through to the teacher agent.
+    """
+
+    if not settings.SQL_FAST_PATH:
+        return None
+    if callback_context.state.get(AWAITING_QUIZ_ANSWER_KEY):
+        callback_context.state[AWAITING_QUIZ_ANSWER_KEY] = False
+        return None
+
+    user_content = callback_context.user_content
+    if not user_content or not user_content.parts:
+        return None
+    text = "".join(part.text or "" for part in user_content.parts)
+    statements = extract_sql(text)
+    if not statements:
+        return None
+
+    session_id = callback_context.state.get(SQL_SESSION_KEY) or callback_context._invocation_context.session.id
+    try:
+        if not await sql_executor.run(check_syntax, session_id, statements):
+            return None
+        if len(statements) == 1 and _EXPLAIN_QUERY_PLAN.match(statements[0]):
+            result = await sql_executor.run(explain_plan, session_id, statements[0])
+            logger.info("Answered a query plan request on the fast path for session %s", session_id)
+            return types.Content(role="model", parts=[types.Part(text=format_plan(statements[0], result))])
+        if len(statements) == 1:
+            result = await sql_executor.run(execute_sql, session_id, statements[0])
+        else:
+            result = await sql_executor.run(execute_script, session_id, "\n".join(statements))
+    except SqlBackendBusyError as e:
+        result = {"response": "error", "details": str(e)}
+    publish_schema_digest(callback_context.state, session_id)
+
+    logger.info("Answered plain SQL message on the fast path for session %s", session_id)
+    sql = "\n".join(statements)
+    return types.Content(role="model", parts=[types.Part(text=format_result(sql, result))])
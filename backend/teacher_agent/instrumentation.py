@@ -0,0 +1,103 @@
+"""Callbacks recording model, tool and run metrics (and trace attributes) for every agent"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest, LlmResponse
+from google.adk.tools import BaseTool, ToolContext
+from opentelemetry import trace
+
+from backend.services.metrics import (
+    AGENT_RUN_TOOL_CALLS,
+    LLM_REQUEST_SECONDS,
+    LLM_TOKENS,
+    LLM_TOKENS_TOTAL,
+    TOOL_CALL_SECONDS,
+)
+from backend.services.tracing import SESSION_ID_ATTRIBUTE
+from backend.tools.session_db import SQL_SESSION_KEY
+
+# calls answered from a before callback never reach the after callback, so the
+# pending entries are bounded
+_MAX_PENDING = 4096
+
+
+class _Pending:
+    """Start times (or counters) keyed by call, oldest dropped first"""
+
+    def __init__(self):
+        self._values: "OrderedDict[Tuple[str, ...], Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, key, value):
+        with self._lock:
+            self._values[key] = value
+            while len(self._values) > _MAX_PENDING:
+                self._values.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            return self._values.pop(key, default)
+
+    def increment(self, key):
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + 1
+            while len(self._values) > _MAX_PENDING:
+                self._values.popitem(last=False)
+
+
+_model_calls = _Pending()
+_tool_calls = _Pending()
+_run_tool_counts = _Pending()
+
+
+def start_model_timer(callback_context: CallbackContext, llm_request: LlmRequest) -> Optional[LlmResponse]:
+    """before_model_callback remembering when the model call started"""
+    # sub-agents run in a throw-away session, tag their spans with the conversation
+    session_id = callback_context.state.get(SQL_SESSION_KEY) or callback_context._invocation_context.session.id
+    trace.get_current_span().set_attribute(SESSION_ID_ATTRIBUTE, session_id)
+    _model_calls.put((callback_context.invocation_id, callback_context.agent_name), time.perf_counter())
+    return None
+
+
+def record_model_call(callback_context: CallbackContext, llm_response: LlmResponse) -> Optional[LlmResponse]:
+    """after_model_callback recording latency and token usage of the final response"""
+    if llm_response.partial:
+        return None
+    agent = callback_context.agent_name
+    started = _model_calls.pop((callback_context.invocation_id, agent))
+    if started is not None:
+        LLM_REQUEST_SECONDS.observe(time.perf_counter() - started, agent=agent)
+
+    usage = llm_response.usage_metadata
+    if usage is not None:
+        for kind, tokens in (("prompt", usage.prompt_token_count), ("completion", usage.candidates_token_count)):
+            if tokens:
+                LLM_TOKENS.observe(tokens, agent=agent, kind=kind)
+                LLM_TOKENS_TOTAL.inc(tokens, agent=agent, kind=kind)
+    return None
+
+
+def start_tool_timer(tool: BaseTool, args: Dict[str, Any], tool_context: ToolContext) -> Optional[Dict]:
+    """before_tool_callback remembering when the tool call started"""
+    _tool_calls.put((tool_context.function_call_id,), time.perf_counter())
+    _run_tool_counts.increment((tool_context.invocation_id, tool_context.agent_name))
+    return None
+
+
+def record_tool_call(tool: BaseTool, args: Dict[str, Any], tool_context: ToolContext,
+                     tool_response: Dict) -> Optional[Dict]:
+    """after_tool_callback recording the duration of the tool call"""
+    started = _tool_calls.pop((tool_context.function_call_id,))
+    if started is not None:
+        TOOL_CALL_SECONDS.observe(time.perf_counter() - started, agent=tool_context.agent_name, tool=tool.name)
+    return None
+
+
+def record_agent_run(callback_context: CallbackContext):
+    """after_agent_callback recording how many tools the run called"""
+    calls = _run_tool_counts.pop((callback_context.invocation_id, callback_context.agent_name), 0)
+    AGENT_RUN_TOOL_CALLS.observe(calls, agent=callback_context.agent_name)
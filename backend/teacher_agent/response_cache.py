@@ -0,0 +1,191 @@
+"""Response cache for sub-agents whose answers are shared by a whole cohort.
+
+Students of one classroom ask the schema designer and the quiz agent for the
+same exercise within minutes of each other. The cache answers repeated
+requests from a ``before_model_callback`` and stores fresh answers from an
+``after_model_callback``. Entries are keyed on the agent name, a hash of its
+final system instruction, a hash of the student's schema digest and the
+normalized prompt, so students only share answers about the same tables.
+An optional second tier matches prompts by embedding similarity.
+"""
+
+import hashlib
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest, LlmResponse
+from google.genai import types
+
+from backend.tools.schema_digest import SCHEMA_DIGEST_KEY
+from settings import settings
+from logging_data.logging_config import get_backend_logger
+
+logger = get_backend_logger(__name__)
+
+
+def normalize_prompt(llm_request: LlmRequest) -> str:
+    """Flatten the request contents into a case and whitespace insensitive string"""
+    lines = []
+    for content in llm_request.contents:
+        text = " ".join(part.text for part in content.parts or [] if part.text)
+        lines.append(f"{content.role}: {text}")
+    return re.sub(r"\s+", " ", "\n".join(lines)).strip().lower()
+
+
+def _cosine(a: List[float], b: List[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+class _Entry:
+    def __init__(self, content: types.Content, embedding: Optional[List[float]]):
+        self.content = content
+        self.embedding = embedding
+        self.created = time.monotonic()
+
+
+class ResponseCache:
+    """Exact-match and (optionally) embedding-similarity cache of model answers"""
+
+    def __init__(self, max_entries: int, ttl: float, semantic: bool = False,
+                 similarity: float = 0.95, embedding_model: str = "text-embedding-004"):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.semantic = semantic
+        self.similarity = similarity
+        self.embedding_model = embedding_model
+        self._entries: "OrderedDict[Tuple[str, str], _Entry]" = OrderedDict()
+        # requests that missed, waiting for the model answer (keyed by invocation)
+        self._pending: "OrderedDict[str, Tuple[Tuple[str, str], Optional[List[float]]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._client = None
+        self._counters = {"exact_hits": 0, "semantic_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    @staticmethod
+    def _namespace(agent_name: str, llm_request: LlmRequest, digest: Optional[str]) -> str:
+        instruction = str(llm_request.config.system_instruction or "")
+        namespace = f"{agent_name}:{hashlib.sha256(instruction.encode()).hexdigest()[:16]}"
+        # answers depend on the student's tables, only empty databases share them
+        if digest:
+            namespace += f":{hashlib.sha256(digest.encode()).hexdigest()[:16]}"
+        return namespace
+
+    async def _embed(self, text: str) -> Optional[List[float]]:
+        if not self.semantic:
+            return None
+        try:
+            if self._client is None:
+                from google import genai
+
+                self._client = genai.Client()
+            response = await self._client.aio.models.embed_content(model=self.embedding_model, contents=text)
+            return list(response.embeddings[0].values)
+        except Exception as e:
+            logger.warning("Could not embed prompt for the response cache: %s", e)
+            return None
+
+    def _expired(self, entry: _Entry) -> bool:
+        return time.monotonic() - entry.created > self.ttl
+
+    def _lookup(self, key: Tuple[str, str], embedding: Optional[List[float]]) -> Optional[types.Content]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and not self._expired(entry):
+                self._entries.move_to_end(key)
+                self._counters["exact_hits"] += 1
+                return entry.content
+
+            if embedding is not None:
+                best, best_score = None, self.similarity
+                for (namespace, _), candidate in self._entries.items():
+                    if namespace != key[0] or candidate.embedding is None or self._expired(candidate):
+                        continue
+                    score = _cosine(embedding, candidate.embedding)
+                    if score >= best_score:
+                        best, best_score = candidate, score
+                if best is not None:
+                    self._counters["semantic_hits"] += 1
+                    return best.content
+
+            self._counters["misses"] += 1
+            return None
+
+    async def before_model(self, callback_context: CallbackContext, llm_request: LlmRequest) -> Optional[LlmResponse]:
+        """Answer from the cache, or remember the request until the model replies"""
+        digest = callback_context.state.get(SCHEMA_DIGEST_KEY)
+        key = (self._namespace(callback_context.agent_name, llm_request, digest), normalize_prompt(llm_request))
+        embedding = await self._embed(key[1])
+        content = self._lookup(key, embedding)
+        if content is not None:
+            logger.info("Response cache hit for %s", callback_context.agent_name)
+            return LlmResponse(content=content.model_copy(deep=True))
+
+        with self._lock:
+            self._pending[callback_context.invocation_id] = (key, embedding)
+            while len(self._pending) > self.max_entries:
+                self._pending.popitem(last=False)
+        return None
+
+    def after_model(self, callback_context: CallbackContext, llm_response: LlmResponse) -> None:
+        """Store a complete text answer for the request that missed"""
+        with self._lock:
+            pending = self._pending.pop(callback_context.invocation_id, None)
+        if pending is None or llm_response.partial or llm_response.error_code or not llm_response.content:
+            return None
+        parts = llm_response.content.parts or []
+        if not parts or any(part.function_call for part in parts):
+            return None
+
+        key, embedding = pending
+        with self._lock:
+            self._entries[key] = _Entry(llm_response.content.model_copy(deep=True), embedding)
+            self._entries.move_to_end(key)
+            self._counters["stores"] += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters["evictions"] += 1
+        return None
+
+    def clear(self):
+        """Drop every cached answer"""
+        with self._lock:
+            self._entries.clear()
+            self._pending.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """Return hit/miss counters and the hit rate"""
+        with self._lock:
+            stats = dict(self._counters)
+            stats["entries"] = len(self._entries)
+        lookups = stats["exact_hits"] + stats["semantic_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["exact_hits"] + stats["semantic_hits"]) / lookups if lookups else 0.0
+        return stats
+
+
+response_cache = ResponseCache(
+    max_entries=settings.RESPONSE_CACHE_SIZE,
+    ttl=settings.RESPONSE_CACHE_TTL,
+    semantic=settings.RESPONSE_CACHE_SEMANTIC,
+    similarity=settings.RESPONSE_CACHE_SIMILARITY,
+    embedding_model=settings.RESPONSE_CACHE_EMBEDDING_MODEL,
+)
+
+
+async def cached_model_response(callback_context: CallbackContext, llm_request: LlmRequest) -> Optional[LlmResponse]:
+    """before_model_callback serving answers from the response cache"""
+    if not settings.RESPONSE_CACHE_ENABLED:
+        return None
+    return await response_cache.before_model(callback_context, llm_request)
+
+
+def store_model_response(callback_context: CallbackContext, llm_response: LlmResponse) -> Optional[LlmResponse]:
+    """after_model_callback filling the response cache"""
+    if not settings.RESPONSE_CACHE_ENABLED:
+        return None
+    return response_cache.after_model(callback_context, llm_response)
@@ -1,6 +1,11 @@
 from google.adk.agents import LlmAgent
 from backend.teacher_agent.sub_agents.memory_agent.prompt import MEMORY_AGENT_INSTRUCTIONS
-from backend.tools.db_connector import db_interactions
+from backend.teacher_agent.callbacks import flag_slow_query, inject_schema_digest
+from backend.teacher_agent.context_cache import use_context_cache
+from backend.tools.db_connector import db_interactions, fetch_more_rows, run_sql_script
+from backend.teacher_agent.instrumentation import (
+    record_agent_run, record_model_call, record_tool_call, start_model_timer, start_tool_timer,
+)
 
 
 memory_agent = LlmAgent(
@@ -8,5 +13,10 @@ memory_agent = LlmAgent(
     model="gemini-2.0-flash",
     description="Responsible for managing and executing all SQL operations within an in-memory SQLite database",
     instruction=MEMORY_AGENT_INSTRUCTIONS,
-    tools=[db_interactions],
+    tools=[db_interactions, run_sql_script, fetch_more_rows],
+    after_agent_callback=record_agent_run,
+    before_model_callback=[inject_schema_digest, start_model_timer, use_context_cache],
+    after_model_callback=record_model_call,
+    before_tool_callback=start_tool_timer,
+    after_tool_callback=[record_tool_call, flag_slow_query],
 )
\ No newline at end of file
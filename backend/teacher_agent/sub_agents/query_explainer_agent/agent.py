@@ -0,0 +1,23 @@
+from google.adk.agents import LlmAgent
+from backend.teacher_agent.sub_agents.query_explainer_agent.prompt import QUERY_EXPLAINER_INSTRUCTIONS
+from backend.teacher_agent.callbacks import inject_schema_digest, plan_before_narrating
+from backend.teacher_agent.context_cache import use_context_cache
+from backend.tools.index_advisor import advise_indexes
+from backend.tools.query_plan import explain_query_plan
+from backend.teacher_agent.instrumentation import (
+    record_agent_run, record_model_call, record_tool_call, start_model_timer, start_tool_timer,
+)
+
+
+query_explainer_agent = LlmAgent(
+    name="query_explainer_agent",
+    model="gemini-2.0-flash",
+    description="Explains how SQLite runs a SQL query (its query plan) and proposes indexes that make it faster",
+    instruction=QUERY_EXPLAINER_INSTRUCTIONS,
+    tools=[explain_query_plan, advise_indexes],
+    after_agent_callback=record_agent_run,
+    before_model_callback=[plan_before_narrating, inject_schema_digest, start_model_timer, use_context_cache],
+    after_model_callback=record_model_call,
+    before_tool_callback=start_tool_timer,
+    after_tool_callback=record_tool_call,
+)
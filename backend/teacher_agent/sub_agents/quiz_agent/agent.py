@@ -1,11 +1,19 @@
 from google.adk.agents import LlmAgent
 from backend.teacher_agent.sub_agents.quiz_agent.prompt import QUIZ_INSTRUCTIONS
+from backend.teacher_agent.context_cache import use_context_cache
+from backend.teacher_agent.response_cache import cached_model_response, store_model_response
 from backend.teacher_agent.sub_agents.schema_designer_agent.agent import schema_designer_agent
 from backend.teacher_agent.sub_agents.memory_agent.agent import memory_agent
+from backend.teacher_agent.callbacks import QUIZ_RESPONSE_KEY, inject_schema_digest, mark_quiz_pending
+from backend.teacher_agent.instrumentation import record_model_call, start_model_timer
 
 quiz_agent = LlmAgent(
     name="quiz_agent",
     model="gemini-2.0-flash",
     description="It generates quizzes about SQL so that the user can test his/her knowledge",
     instruction=QUIZ_INSTRUCTIONS,
+    output_key=QUIZ_RESPONSE_KEY,
+    after_agent_callback=mark_quiz_pending,
+    before_model_callback=[cached_model_response, inject_schema_digest, start_model_timer, use_context_cache],
+    after_model_callback=[record_model_call, store_model_response],
 )
\ No newline at end of file
@@ -1,5 +1,9 @@
 from google.adk.agents import LlmAgent
 from backend.teacher_agent.sub_agents.schema_designer_agent.prompt import SCHEMA_DESIGNER_INSTRUCTIONS
+from backend.teacher_agent.callbacks import inject_schema_digest
+from backend.teacher_agent.context_cache import use_context_cache
+from backend.teacher_agent.response_cache import cached_model_response, store_model_response
+from backend.teacher_agent.instrumentation import record_model_call, start_model_timer
 
 schema_designer_agent = LlmAgent(
     name="schema_designer_agent",
@@ -7,4 +11,6 @@ schema_designer_agent = LlmAgent(
     description="The schema designer agent who is responsible of generating SQL schema based on user description",
     instruction=SCHEMA_DESIGNER_INSTRUCTIONS,
     output_key="designer_response",
+    before_model_callback=[cached_model_response, inject_schema_digest, start_model_timer, use_context_cache],
+    after_model_callback=[record_model_call, store_model_response],
 )
\ No newline at end of file
@@ -1,23 +1,316 @@
+import re
 import sqlite3
+import time
+import sqlparse
 from google.adk.tools import ToolContext
+from backend.services.metrics import SQL_ROWS, SQL_SECONDS
+from backend.services.tracing import traced_sql
+from backend.tools.query_budget import new_query_budget
+from backend.tools.schema_digest import SCHEMA_DIGEST_KEY, written_tables
+from backend.tools.session_db import SQL_SESSION_KEY, session_databases
+from backend.tools.sql_executor import SqlBackendBusyError, sql_executor
+from settings import settings
+from logging_data.logging_config import get_backend_logger
 
-_connection = sqlite3.connect(":memory:", check_same_thread=False)
-_cursor = _connection.cursor()
+logger = get_backend_logger(__name__)
 
-def db_interactions(sql_command: str):
+
+_SYNTAX_ERRORS = ("syntax error", "incomplete input", "unrecognized token")
+_TRANSACTION_KEYWORDS = {"BEGIN", "COMMIT", "END", "ROLLBACK", "SAVEPOINT", "RELEASE"}
+# statements an index can speed up, kept in the query history of the session
+_INDEXABLE = re.compile(r"^\s*(SELECT|WITH|UPDATE|DELETE)\b", re.IGNORECASE)
+# statements that can never write, run without the write lock of the session
+_READ_ONLY = re.compile(r"^\s*(SELECT|EXPLAIN|VALUES)\b", re.IGNORECASE)
+
+
+def get_sql_session_id(tool_context: ToolContext) -> str:
+    """Return the id of the conversation whose database the tool should use"""
+    return tool_context.state.get(SQL_SESSION_KEY) or tool_context._invocation_context.session.id
+
+
+def _read_page(cursor: sqlite3.Cursor, offset: int):
+    """Skip ``offset`` rows, return the next page and count (up to a limit) the rows left"""
+
+    skipped = 0
+    while skipped < offset:
+        chunk = cursor.fetchmany(min(offset - skipped, 1000))
+        if not chunk:
+            break
+        skipped += len(chunk)
+
+    rows = cursor.fetchmany(settings.SQL_PAGE_SIZE)
+
+    remaining = 0
+    while remaining < settings.SQL_COUNT_LIMIT:
+        chunk = cursor.fetchmany(1000)
+        if not chunk:
+            return rows, remaining, True
+        remaining += len(chunk)
+    return rows, remaining, False
+
+
+def _describe_error(error: Exception, budget) -> str:
+    """Turn an exception raised by a statement into a message for the agent"""
+
+    if budget.exceeded:
+        return budget.exceeded
+    if isinstance(error, sqlite3.OperationalError) and error.sqlite_errorname == "SQLITE_FULL":
+        return f"the session database is limited to {settings.SQL_MAX_DB_MB} MB"
+    if isinstance(error, sqlite3.DatabaseError) and any(
+        marker in str(error) for marker in ("not authorized", "authorization denied", "attached databases")
+    ):
+        return "ATTACH, VACUUM and changing the size limit are not allowed on the session database"
+    logger.debug("Statement failed: %s", error)
+    return str(error)
+
+
+@traced_sql("statement")
+def execute_sql(session_id: str, sql_command: str, offset: int = 0):
+    """Execute one SQL command against the database of a session (blocking).
+
+    Row-returning statements (SELECT, WITH, PRAGMA, EXPLAIN, ... RETURNING) only
+    send back one page of rows; when more are available a page token is issued
+    that fetch_more_rows exchanges for the next page.
     """
-    Execute SQL commands within an in-memory SQLite database.
-    Handles schema creation, data manipulation, and querying.
+
+    write = not _READ_ONLY.match(sql_command)
+    try:
+        with session_databases.acquire(session_id, write=write) as (database, connection):
+            cursor = connection.cursor()
+            budget = new_query_budget()
+            changes = connection.total_changes
+            started = time.perf_counter()
+            try:
+                with budget.guard(connection):
+                    cursor.execute(sql_command)
+                    if cursor.description is None:
+                        connection.commit()
+                        rows = None
+                    else:
+                        rows, remaining, exact = _read_page(cursor, offset)
+                        # statements with RETURNING write on their first step
+                        read_only = connection.total_changes == changes
+                        if connection.in_transaction:
+                            connection.commit()
+            except Exception as e:
+                connection.rollback()
+                SQL_SECONDS.observe(time.perf_counter() - started, kind="statement", outcome="error")
+                return {"response": "error", "details": _describe_error(e, budget)}
+            finally:
+                cursor.close()
+
+            duration = time.perf_counter() - started
+            SQL_SECONDS.observe(duration, kind="statement", outcome="ok")
+            if offset == 0 and _INDEXABLE.match(sql_command):
+                database.record_query(sql_command, duration)
+            if rows is None:
+                database.mark_changed()
+                database.digest.refresh(connection, written_tables([sql_command]))
+                return {"response": "successfully executed command", "duration_ms": round(duration * 1000, 3)}
+            if not read_only:
+                database.mark_changed()
+                database.digest.refresh(connection, written_tables([sql_command]))
+            SQL_ROWS.observe(len(rows))
+
+            result = {
+                "response": "query executed successfully",
+                "columns": [column[0] for column in cursor.description],
+                "rows": rows,
+                "offset": offset,
+                "total_rows_estimate": offset + len(rows) + remaining,
+                "total_rows_exact": exact,
+                "truncated": remaining > 0,
+                "duration_ms": round(duration * 1000, 3),
+            }
+            if remaining and read_only:
+                result["page_token"] = database.add_page_token(sql_command, offset + len(rows))
+            return result
+    except Exception as e:
+        logger.error("Could not execute SQL for session %s: %s", session_id, e)
+        return {"response": "error", "details": str(e)}
+
+
+def split_script(sql_script: str):
+    """Split a SQL script into its statements, dropping empty ones and bare comments"""
+
+    statements = []
+    for statement in sqlparse.split(sql_script):
+        if sqlparse.format(statement, strip_comments=True).strip():
+            statements.append(statement.strip())
+    return statements
+
+
+@traced_sql("script")
+def execute_script(session_id: str, sql_script: str):
+    """Execute every statement of a script in a single transaction (blocking).
+
+    If one statement fails the whole script is rolled back. Transaction
+    control statements inside the script are skipped, since the script
+    already runs in its own transaction.
     """
 
+    statements = split_script(sql_script)
+    if not statements:
+        return {"response": "error", "details": "the script does not contain any SQL statement"}
+
+    results = []
     try:
-        _cursor.execute(sql_command)
-        if sql_command.strip().lower().startswith("select"):
-            rows = _cursor.fetchall()
-            return {"response": "query executed successfully", "rows": rows}
-        else:
-            _connection.commit()
-            return {"response": "successfully executed command"}
+        with session_databases.acquire(session_id, write=True) as (database, connection):
+            cursor = connection.cursor()
+            budget = new_query_budget()
+            changes = connection.total_changes
+            started = time.perf_counter()
+            # the statement running when an error is raised, if the error is not raised by BEGIN or COMMIT
+            failed = None
+            try:
+                # one budget for the whole script, not one per statement
+                with budget.guard(connection):
+                    connection.execute("BEGIN")
+                    for index, statement in enumerate(statements):
+                        if sqlparse.parse(statement)[0].token_first(skip_cm=True).normalized in _TRANSACTION_KEYWORDS:
+                            results.append(
+                                {"statement": statement, "response": "skipped, the script already runs in one transaction"}
+                            )
+                            continue
+
+                        failed = (index, statement)
+                        statement_started = time.perf_counter()
+                        cursor.execute(statement)
+                        rows = cursor.fetchmany(settings.SQL_PAGE_SIZE) if cursor.description else None
+
+                        result = {
+                            "statement": statement,
+                            "response": "ok",
+                            "duration_ms": round((time.perf_counter() - statement_started) * 1000, 3),
+                        }
+                        if rows is None:
+                            result["rows_affected"] = cursor.rowcount
+                        else:
+                            result["columns"] = [column[0] for column in cursor.description]
+                            result["rows"] = rows
+                            result["truncated"] = cursor.fetchone() is not None
+                        results.append(result)
+                        failed = None
+
+                    connection.commit()
+            except Exception as e:
+                # never hand the connection back to the pool with a transaction open
+                connection.rollback()
+                SQL_SECONDS.observe(time.perf_counter() - started, kind="script", outcome="error")
+                error = {"response": "error", "details": _describe_error(e, budget)}
+                if failed is not None:
+                    error.update(failed_statement=failed[0] + 1, statement=failed[1])
+                error.update(results=results, rolled_back=True)
+                return error
+            finally:
+                cursor.close()
+
+            SQL_SECONDS.observe(time.perf_counter() - started, kind="script", outcome="ok")
+            if connection.total_changes != changes or any("rows_affected" in result for result in results):
+                database.mark_changed()
+                database.digest.refresh(connection, written_tables(statements))
+            return {
+                "response": f"script executed successfully ({len(statements)} statements in one transaction)",
+                "results": results,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+            }
     except Exception as e:
-        print(e)
-        return {"response": "error", "details": str(e)}
\ No newline at end of file
+        logger.error("Could not execute SQL script for session %s: %s", session_id, e)
+        return {"response": "error", "details": str(e)}
+
+
+def check_syntax(session_id: str, statements) -> bool:
+    """Return False if one of the statements is not valid SQLite syntax (blocking).
+
+    Statements are only compiled through EXPLAIN, never run, so errors such as
+    a missing table (which may be created by an earlier statement) still pass.
+    """
+
+    with session_databases.acquire(session_id) as (database, connection):
+        for statement in statements:
+            if statement.lstrip().upper().startswith("EXPLAIN"):
+                statement = statement.lstrip()[len("EXPLAIN"):]
+            try:
+                connection.execute(f"EXPLAIN {statement}").close()
+            except sqlite3.Error as e:
+                if any(marker in str(e) for marker in _SYNTAX_ERRORS):
+                    return False
+    return True
+
+
+def schema_digest(session_id: str) -> str:
+    """Return the tables, columns and row counts of a session database (blocking).
+
+    With file storage other workers may have changed the data, so every
+    table is counted again; otherwise the digest the tools keep up to date
+    is returned as is.
+    """
+
+    with session_databases.acquire(session_id) as (database, connection):
+        if database.digest.text is None or database.database_path is not None:
+            return database.digest.refresh(connection) or ""
+        return database.digest.text
+
+
+def publish_schema_digest(state, session_id: str):
+    """Copy the schema digest of a session into the agent state when it changed"""
+
+    digest = session_databases.schema_digest(session_id)
+    if digest is not None and state.get(SCHEMA_DIGEST_KEY) != digest:
+        state[SCHEMA_DIGEST_KEY] = digest
+
+
+def fetch_page(session_id: str, page_token: str):
+    """Return the page of rows a page token points to (blocking)"""
+
+    page = session_databases.get(session_id).pop_page_token(page_token)
+    if page is None:
+        return {"response": "error", "details": "unknown or expired page token, please run the query again"}
+    sql_command, offset = page
+    return execute_sql(session_id, sql_command, offset)
+
+
+async def db_interactions(sql_command: str, tool_context: ToolContext):
+    """
+    Execute SQL commands within the in-memory SQLite database of the current session.
+    Handles schema creation, data manipulation, and querying.
+    Queries return at most one page of rows; if "truncated" is true and a
+    "page_token" is present, call fetch_more_rows with it to get the next page.
+    """
+
+    session_id = get_sql_session_id(tool_context)
+    try:
+        result = await sql_executor.run(execute_sql, session_id, sql_command)
+    except SqlBackendBusyError as e:
+        return {"response": "error", "details": str(e)}
+    publish_schema_digest(tool_context.state, session_id)
+    return result
+
+
+async def fetch_more_rows(page_token: str, tool_context: ToolContext):
+    """
+    Fetch the next page of rows of a query previously run with db_interactions,
+    using the "page_token" it returned.
+    """
+
+    try:
+        return await sql_executor.run(fetch_page, get_sql_session_id(tool_context), page_token)
+    except SqlBackendBusyError as e:
+        return {"response": "error", "details": str(e)}
+
+
+async def run_sql_script(sql_script: str, tool_context: ToolContext):
+    """
+    Execute a whole SQL script (several statements separated by ;) in a single
+    transaction within the in-memory SQLite database of the current session.
+    Returns the result and duration of every statement; if one statement fails
+    nothing of the script is kept.
+    """
+
+    session_id = get_sql_session_id(tool_context)
+    try:
+        result = await sql_executor.run(execute_script, session_id, sql_script)
+    except SqlBackendBusyError as e:
+        return {"response": "error", "details": str(e)}
+    publish_schema_digest(tool_context.state, session_id)
+    return result
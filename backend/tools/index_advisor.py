@@ -0,0 +1,320 @@
+"""Index advice for the queries of a session.
+
+The advisor reads the plans of a query (or of the most expensive queries of
+the session's history) and, for every table SQLite scans fully or indexes
+on the fly, proposes a ``CREATE INDEX`` on the columns the query filters or
+joins on: equality columns first, then one range column, as SQLite can use
+them. Proposals can be measured on a copy of the session database, so the
+student's schema is never changed behind their back.
+"""
+
+import re
+import sqlite3
+import time
+from typing import Dict, List, Optional, Tuple
+
+import sqlparse
+from google.adk.tools import ToolContext
+from sqlparse import tokens
+from sqlparse.sql import Comparison, Identifier, IdentifierList, Parenthesis, Where
+
+from backend.tools.db_connector import get_sql_session_id, split_script
+from backend.tools.query_budget import new_query_budget
+from backend.tools.query_plan import build_plan, table_aliases, walk_steps
+from backend.tools.session_db import session_databases
+from backend.tools.sql_executor import SqlBackendBusyError, sql_executor
+from settings import settings
+from logging_data.logging_config import get_backend_logger
+
+logger = get_backend_logger(__name__)
+
+_EQUALITY = {"=", "==", "IS"}
+_RANGE = {"<", ">", "<=", ">="}
+_CONSTRAINT_COLUMN = re.compile(r"(\w+)\s*(=|<=|>=|<|>)")
+_READ_ONLY = re.compile(r"^\s*(SELECT|WITH)\b", re.IGNORECASE)
+_MAX_INDEX_COLUMNS = 3
+# a query slower than this is timed only once
+_SLOW_RUN = 1.0  # seconds
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _has_top_level_or(token_list) -> bool:
+    return any(token.is_keyword and token.normalized == "OR" for token in token_list.tokens)
+
+
+def _column(token) -> Optional[Tuple[Optional[str], str]]:
+    if isinstance(token, Identifier) and token.get_real_name():
+        return token.get_parent_name(), token.get_real_name()
+    return None
+
+
+def predicates(token_list) -> List[Tuple[Optional[str], str, str]]:
+    """(qualifier, column, kind) of every column a WHERE or ON condition compares.
+
+    The kind is "eq" for an equality with a value, "join" for an equality
+    with another column and "range" for an inequality.
+
+    Conditions combined with OR are left out: an index on one of them alone
+    does not remove the scan.
+    """
+    found = []
+    items = [token for token in token_list.tokens if not token.is_whitespace and token.ttype not in tokens.Comment]
+    assignments = False
+    for index, token in enumerate(items):
+        following = items[index + 1] if index + 1 < len(items) else None
+        if token.is_keyword and token.normalized == "SET":
+            assignments = True
+        elif isinstance(token, Where):
+            assignments = False
+            if not _has_top_level_or(token):
+                found += predicates(token)
+        elif assignments:
+            continue
+        elif isinstance(token, Comparison):
+            operator = next((child.normalized for child in token.tokens if child.ttype == tokens.Operator.Comparison), "")
+            kind = "eq" if operator in _EQUALITY else "range" if operator in _RANGE else None
+            columns = [column for column in (_column(token.left), _column(token.right)) if column]
+            if kind == "eq" and len(columns) == 2:
+                kind = "join"
+            if kind:
+                found += [(*column, kind) for column in columns]
+        elif _column(token) and following is not None and following.is_keyword:
+            if following.normalized in ("IN", "IS"):
+                found.append((*_column(token), "eq"))
+            elif following.normalized == "BETWEEN":
+                found.append((*_column(token), "range"))
+        elif isinstance(token, Parenthesis):
+            if not _has_top_level_or(token):
+                found += predicates(token)
+        elif token.is_group and not isinstance(token, (Identifier, IdentifierList)):
+            found += predicates(token)
+    return found
+
+
+def order_by_columns(statement) -> List[Tuple[Optional[str], str]]:
+    """(qualifier, column) of the ORDER BY of the outer query"""
+    items = [token for token in statement.tokens if not token.is_whitespace]
+    for index, token in enumerate(items[:-1]):
+        if token.is_keyword and token.normalized == "ORDER BY":
+            following = items[index + 1]
+            identifiers = following.get_identifiers() if isinstance(following, IdentifierList) else [following]
+            return [column for column in map(_column, identifiers) if column]
+    return []
+
+
+class _Schema:
+    """Columns and index prefixes of the tables of a database, read on demand"""
+
+    def __init__(self, connection: sqlite3.Connection):
+        self.connection = connection
+        self._columns: Dict[str, Dict[str, str]] = {}
+
+    def columns(self, table: str) -> Dict[str, str]:
+        """Lowercased column name -> column name"""
+        if table not in self._columns:
+            rows = self.connection.execute(f"PRAGMA table_info({_quote(table)})").fetchall()
+            self._columns[table] = {row[1].lower(): row[1] for row in rows}
+        return self._columns[table]
+
+    def indexes(self, table: str) -> List[List[str]]:
+        indexes = []
+        for row in self.connection.execute(f"PRAGMA index_list({_quote(table)})").fetchall():
+            info = self.connection.execute(f"PRAGMA index_info({_quote(row[1])})").fetchall()
+            indexes.append([(column[2] or "").lower() for column in info])
+        return indexes
+
+
+def _resolve(schema: _Schema, aliases: Dict[str, str], qualifier: Optional[str], column: str) -> Optional[Tuple[str, str]]:
+    """Table and column name a (qualifier, column) refers to, when it is a real column"""
+    if qualifier:
+        table = aliases.get(qualifier.lower())
+        candidates = [table] if table else []
+    else:
+        candidates = list(dict.fromkeys(aliases.values()))
+    matches = [(table, schema.columns(table)[column.lower()]) for table in candidates if column.lower() in schema.columns(table)]
+    return matches[0] if len(matches) == 1 else None
+
+
+def _index_columns(step: Dict, table_predicates: List[Tuple[str, str]], table_order: List[str],
+                   sorts: bool) -> List[str]:
+    """Columns of the index that would replace a full scan or an automatic index of a table"""
+    if step["operation"] == "automatic_index":
+        matches = _CONSTRAINT_COLUMN.findall(step["constraint"])
+        table_predicates = [(column, "eq" if operator == "=" else "range") for column, operator in matches]
+    # equalities with a value narrow the search the most, join columns come next
+    equalities = [column for column, kind in table_predicates if kind == "eq"]
+    equalities += [column for column, kind in table_predicates if kind == "join"]
+    ranges = [column for column, kind in table_predicates if kind == "range"]
+    columns = list(dict.fromkeys(equalities))[:_MAX_INDEX_COLUMNS]
+    if ranges and len(columns) < _MAX_INDEX_COLUMNS:
+        columns.append(ranges[0])
+    if not columns and sorts:
+        # nothing filters the table, but an index in ORDER BY order avoids the sort
+        columns = table_order[:_MAX_INDEX_COLUMNS]
+    return list(dict.fromkeys(columns))
+
+
+def propose_indexes(connection: sqlite3.Connection, sql: str) -> List[Dict]:
+    """Indexes that would remove the full scans and automatic indexes of one query"""
+    plan = build_plan(connection, sql)
+    statement = sqlparse.parse(sql)[0]
+    aliases = table_aliases(statement)
+    schema = _Schema(connection)
+    tables = {row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+    by_table: Dict[str, List[Tuple[str, str]]] = {}
+    for qualifier, column, kind in predicates(statement):
+        resolved = _resolve(schema, aliases, qualifier, column)
+        if resolved:
+            by_table.setdefault(resolved[0], []).append((resolved[1], kind))
+    order: Dict[str, List[str]] = {}
+    for qualifier, column in order_by_columns(statement):
+        resolved = _resolve(schema, aliases, qualifier, column)
+        if resolved:
+            order.setdefault(resolved[0], []).append(resolved[1])
+    sorts = any(step["operation"] == "temp_btree" and "ORDER BY" in step["purpose"] for step in walk_steps(plan))
+
+    proposals = []
+    for step in walk_steps(plan):
+        # recent SQLite versions name a table by its alias in the plan
+        table = aliases.get((step.get("table") or "").lower(), step.get("table"))
+        if step["operation"] not in ("full_scan", "automatic_index") or table not in tables:
+            continue
+        # ORDER BY only helps when it names columns of this table alone
+        table_order = order.get(table, []) if len(order) == 1 else []
+        columns = _index_columns(step, by_table.get(table, []), table_order, sorts)
+        if not columns:
+            continue
+        lowered = [column.lower() for column in columns]
+        if any(existing[:len(lowered)] == lowered for existing in schema.indexes(table)):
+            continue
+        name = re.sub(r"\W", "_", f"ix_{table}_{'_'.join(columns)}").lower()
+        reason = (
+            f"SQLite builds a temporary index on {table} every time the query runs"
+            if step["operation"] == "automatic_index"
+            else f"every row of {table} is read (full scan)"
+        )
+        proposals.append({
+            "table": table,
+            "columns": columns,
+            "sql": f"CREATE INDEX IF NOT EXISTS {name} ON {_quote(table)} ({', '.join(map(_quote, columns))});",
+            "reason": reason,
+        })
+    return proposals
+
+
+def _time_query(connection: sqlite3.Connection, sql: str) -> Optional[float]:
+    """Best duration of a few complete runs of a query, None if it fails or exceeds the budget"""
+    best = None
+    for _ in range(max(settings.INDEX_ADVISOR_RUNS, 1)):
+        budget = new_query_budget()
+        started = time.perf_counter()
+        try:
+            with budget.guard(connection):
+                cursor = connection.execute(sql)
+                while cursor.fetchmany(1000):
+                    pass
+        except sqlite3.Error:
+            return None
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+        if elapsed > _SLOW_RUN:
+            break
+    return best
+
+
+def _measure(scratch: sqlite3.Connection, proposals: List[Dict], queries: List[str]) -> List[Dict]:
+    """Time every query before and after creating the indexes proposed for it on a copy of the database"""
+    deadline = time.monotonic() + settings.SQL_TIMEOUT * 2
+    measurements = []
+    for sql in queries:
+        entry = {"query": sql}
+        timed = _READ_ONLY.match(sql) and time.monotonic() < deadline
+        before = _time_query(scratch, sql) if timed else None
+        # each query gets only its own indexes, rolled back afterwards
+        scratch.execute("SAVEPOINT advise")
+        try:
+            for proposal in proposals:
+                if sql in proposal["queries"]:
+                    scratch.execute(proposal["sql"])
+            after = _time_query(scratch, sql) if timed and time.monotonic() < deadline else None
+            entry["plan_after"] = [step["detail"] for step in walk_steps(build_plan(scratch, sql))]
+        finally:
+            scratch.execute("ROLLBACK TO advise")
+            scratch.execute("RELEASE advise")
+        if not timed:
+            entry["note"] = "not timed: it writes data or the time budget ran out"
+        else:
+            entry["before_ms"] = None if before is None else round(before * 1000, 3)
+            entry["after_ms"] = None if after is None else round(after * 1000, 3)
+            if before and after:
+                entry["speedup"] = round(before / after, 1)
+        measurements.append(entry)
+    return measurements
+
+
+def advise(session_id: str, sql_query: str = "", measure: bool = False) -> Dict:
+    """Propose indexes for a query, or for the most expensive queries of the session (blocking)"""
+
+    database = session_databases.get(session_id)
+    if sql_query.strip():
+        statements = split_script(sql_query)
+        if len(statements) != 1:
+            return {"response": "error", "details": "give exactly one SQL statement to advise on"}
+        queries = [statements[0].rstrip(";")]
+    else:
+        queries = [entry["sql"] for entry in database.query_history()[:settings.INDEX_ADVISOR_MAX_QUERIES]]
+        if not queries:
+            return {"response": "no queries have been run in this session yet"}
+
+    proposals: Dict[str, Dict] = {}
+    errors = {}
+    scratch = None
+    try:
+        with session_databases.acquire(session_id) as (database, connection):
+            for sql in queries:
+                try:
+                    for proposal in propose_indexes(connection, sql):
+                        proposals.setdefault(proposal["sql"], dict(proposal, queries=[]))["queries"].append(sql)
+                except sqlite3.Error as e:
+                    errors[sql] = str(e)
+            if measure and proposals:
+                scratch = sqlite3.connect(":memory:", isolation_level=None, check_same_thread=False)
+                connection.backup(scratch)
+
+        result = {
+            "response": f"{len(proposals)} index(es) proposed" if proposals else "no index would remove a scan",
+            "analyzed_queries": queries,
+            "proposals": list(proposals.values()),
+        }
+        if errors:
+            result["errors"] = errors
+        if scratch is not None:
+            helped = list(dict.fromkeys(sql for proposal in proposals.values() for sql in proposal["queries"]))
+            result["measurements"] = _measure(scratch, list(proposals.values()), helped)
+            result["note"] = "measured on a copy of the database; run the CREATE INDEX statements to keep the indexes"
+        return result
+    except Exception as e:
+        logger.error("Could not advise indexes for session %s: %s", session_id, e)
+        return {"response": "error", "details": str(e)}
+    finally:
+        if scratch is not None:
+            scratch.close()
+
+
+async def advise_indexes(sql_query: str, measure: bool, tool_context: ToolContext):
+    """
+    Propose CREATE INDEX statements that remove the full table scans of a query.
+    Pass one SQL query, or an empty string to analyze the slowest queries run
+    in this session. With measure=true the queries are timed before and after
+    creating the indexes on a copy of the database (the user's database is not
+    changed); the user decides whether to create the indexes.
+    """
+
+    try:
+        return await sql_executor.run(advise, get_sql_session_id(tool_context), sql_query, measure)
+    except SqlBackendBusyError as e:
+        return {"response": "error", "details": str(e)}
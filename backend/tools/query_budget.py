@@ -0,0 +1,54 @@
+"""Wall-clock and VM-step budgets for student SQL"""
+
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from settings import settings
+
+
+class QueryBudget:
+    """Aborts a statement through the SQLite progress handler once it runs too long.
+
+    The handler is invoked every ``interval`` virtual machine instructions, so
+    both budgets are checked with that granularity.
+    """
+
+    def __init__(self, timeout: float, max_steps: int, interval: int):
+        self.timeout = timeout
+        self.max_steps = max_steps
+        self.interval = interval
+        self.exceeded: Optional[str] = None
+        self._deadline = 0.0
+        self._steps = 0
+
+    def _check(self) -> int:
+        self._steps += self.interval
+        if self._steps > self.max_steps:
+            self.exceeded = f"query exceeded the budget of {self.max_steps} SQLite VM steps"
+        elif time.monotonic() > self._deadline:
+            self.exceeded = f"query exceeded the time limit of {self.timeout:g} seconds"
+        # a non-zero return value interrupts the running statement
+        return 1 if self.exceeded else 0
+
+    @contextmanager
+    def guard(self, connection: sqlite3.Connection) -> Iterator["QueryBudget"]:
+        """Enforce the budget on every statement run inside the block"""
+        self.exceeded = None
+        self._steps = 0
+        self._deadline = time.monotonic() + self.timeout
+        connection.set_progress_handler(self._check, self.interval)
+        try:
+            yield self
+        finally:
+            connection.set_progress_handler(None, 0)
+
+
+def new_query_budget() -> QueryBudget:
+    """Return a budget configured from the application settings"""
+    return QueryBudget(
+        timeout=settings.SQL_TIMEOUT,
+        max_steps=settings.SQL_MAX_STEPS,
+        interval=settings.SQL_PROGRESS_INTERVAL,
+    )
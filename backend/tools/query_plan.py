@@ -0,0 +1,283 @@
+"""Structured query plans built from SQLite's ``EXPLAIN QUERY PLAN``.
+
+The plan of a statement is computed without running it, so it takes a few
+milliseconds whatever the size of the data. Every step is classified (full
+scan, index scan, index or rowid seek, automatic index, temporary B-tree,
+subquery) and the findings a student should notice are spelled out, so the
+query explainer only has to turn the structure into prose.
+"""
+
+import re
+import sqlite3
+import time
+from typing import Dict, List, Optional
+
+import sqlparse
+from google.adk.tools import ToolContext
+from sqlparse import tokens
+from sqlparse.sql import Identifier, IdentifierList, Parenthesis, Where
+
+from backend.services.metrics import SQL_SECONDS
+from backend.services.tracing import traced_sql
+from backend.tools.db_connector import get_sql_session_id, split_script
+from backend.tools.query_budget import new_query_budget
+from backend.tools.session_db import session_databases
+from backend.tools.sql_executor import SqlBackendBusyError, sql_executor
+from settings import settings
+from logging_data.logging_config import get_backend_logger
+
+logger = get_backend_logger(__name__)
+
+_EXPLAIN_PREFIX = re.compile(r"^\s*EXPLAIN(?:\s+QUERY\s+PLAN)?\s+", re.IGNORECASE)
+_ACCESS = re.compile(
+    r"^(?P<operation>SCAN|SEARCH)(?: TABLE)? (?P<table>\S+)(?: AS (?P<alias>\S+))?"
+    r"(?: USING (?P<using>.*?))?(?P<left_join> LEFT-JOIN)?$"
+)
+_USING_INDEX = re.compile(r"^(?P<covering>COVERING )?INDEX (?P<index>\S+)(?: \((?P<constraint>.*)\))?$")
+_AUTOMATIC = re.compile(r"^AUTOMATIC (?:PARTIAL )?(?P<covering>COVERING )?INDEX \((?P<constraint>.*)\)$")
+_PRIMARY_KEY = re.compile(r"^(?:INTEGER )?PRIMARY KEY(?: \((?P<constraint>.*)\))?$")
+_TEMP_BTREE = re.compile(r"^USE TEMP B-TREE FOR (?P<purpose>.*)$")
+_SUBQUERY = re.compile(r"^(?:CORRELATED )?(?:SCALAR|LIST) SUBQUERY|^CO-ROUTINE|^MATERIALIZE")
+_SQL_IN_TEXT = re.compile(
+    r"```(?:sql)?\s*(?P<fenced>.*?)```|(?P<inline>\b(?:SELECT|WITH|INSERT|UPDATE|DELETE|REPLACE)\b[^;]*;?)",
+    re.IGNORECASE | re.DOTALL,
+)
+_CLAUSES = ("DISTINCT", "JOIN", "GROUP BY", "HAVING", "ORDER BY", "LIMIT", "UNION", "INTERSECT", "EXCEPT")
+
+
+def find_sql(text: str) -> Optional[str]:
+    """Return the first SQL statement of a message (fenced or inline), if any.
+
+    Inline SQL only counts when it ends with ``;`` or its keyword is written
+    in capitals, so prose such as "select rows with a filter" is skipped.
+    Callers still have to check that the candidate compiles.
+    """
+    for match in _SQL_IN_TEXT.finditer(text or ""):
+        if match.group("fenced") is not None:
+            sql = match.group("fenced").strip()
+        else:
+            sql = match.group("inline").strip()
+            if not (sqlite3.complete_statement(sql) or sql.split(None, 1)[0].isupper()):
+                continue
+        if sql:
+            return sql
+    return None
+
+
+def classify_step(detail: str) -> Dict:
+    """Describe one line of EXPLAIN QUERY PLAN output"""
+    step = {"detail": detail, "operation": "other"}
+    access = _ACCESS.match(detail)
+    if access is not None:
+        step["table"] = access.group("table")
+        if access.group("alias"):
+            step["alias"] = access.group("alias")
+        if access.group("left_join"):
+            step["left_join"] = True
+        using = access.group("using") or ""
+        index, automatic, primary_key = _USING_INDEX.match(using), _AUTOMATIC.match(using), _PRIMARY_KEY.match(using)
+        if automatic is not None:
+            step.update(operation="automatic_index", constraint=automatic.group("constraint"))
+        elif primary_key is not None:
+            step.update(operation="rowid_seek" if access.group("operation") == "SEARCH" else "rowid_scan")
+            if primary_key.group("constraint"):
+                step["constraint"] = primary_key.group("constraint")
+        elif index is not None:
+            step.update(
+                operation="index_seek" if access.group("operation") == "SEARCH" else "index_scan",
+                index=index.group("index"),
+                covering=bool(index.group("covering")),
+            )
+            if index.group("constraint"):
+                step["constraint"] = index.group("constraint")
+        elif access.group("operation") == "SCAN":
+            step["operation"] = "full_scan"
+        else:
+            step["operation"] = "search"
+        return step
+
+    temp_btree = _TEMP_BTREE.match(detail)
+    if temp_btree is not None:
+        step.update(operation="temp_btree", purpose=temp_btree.group("purpose"))
+    elif _SUBQUERY.match(detail):
+        step.update(operation="subquery", correlated=detail.startswith("CORRELATED"))
+    elif detail.startswith("COMPOUND") or detail.endswith("USING TEMP B-TREE"):
+        step["operation"] = "compound"
+    return step
+
+
+def _build_tree(rows) -> List[Dict]:
+    nodes, roots = {}, []
+    for node_id, parent, _, detail in rows:
+        node = classify_step(detail)
+        node["children"] = []
+        nodes[node_id] = node
+        (nodes[parent]["children"] if parent in nodes else roots).append(node)
+    return roots
+
+
+def build_plan(connection: sqlite3.Connection, sql: str) -> List[Dict]:
+    """Return the classified steps of the plan of ``sql`` as a tree"""
+    return _build_tree(connection.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall())
+
+
+def walk_steps(steps: List[Dict]):
+    """Every step of a plan tree, parents before their children"""
+    for step in steps:
+        yield step
+        yield from walk_steps(step["children"])
+
+
+def _join_order(steps: List[Dict]) -> List[str]:
+    """Tables of the outermost loop first, for the first level of the plan that reads tables"""
+    level = [step for step in steps if "table" in step]
+    if level:
+        return [step.get("alias") or step["table"] for step in level]
+    for step in steps:
+        order = _join_order(step["children"])
+        if order:
+            return order
+    return []
+
+
+def table_aliases(statement) -> Dict[str, str]:
+    """Map every table name and alias after FROM / JOIN / INTO / UPDATE (lowercased) to its table"""
+    aliases = {}
+    expect_table = False
+    for token in statement.tokens:
+        if token.is_whitespace or token.ttype in tokens.Comment:
+            continue
+        if isinstance(token, Parenthesis) or isinstance(token, Where):
+            aliases.update(table_aliases(token))
+            expect_table = False
+        elif expect_table and isinstance(token, (Identifier, IdentifierList)):
+            identifiers = token.get_identifiers() if isinstance(token, IdentifierList) else [token]
+            for identifier in identifiers:
+                if isinstance(identifier, Identifier):
+                    subqueries = [child for child in identifier.tokens if isinstance(child, Parenthesis)]
+                    if subqueries:
+                        aliases.update(table_aliases(subqueries[0]))
+                    elif identifier.get_real_name():
+                        name = identifier.get_real_name()
+                        aliases.setdefault(name.lower(), name)
+                        if identifier.get_alias():
+                            aliases[identifier.get_alias().lower()] = name
+            expect_table = False
+        elif token.is_group and not isinstance(token, (Identifier, IdentifierList)):
+            aliases.update(table_aliases(token))
+        else:
+            expect_table = token.is_keyword and (
+                token.normalized in ("FROM", "INTO", "UPDATE", "TABLE") or token.normalized.endswith("JOIN")
+            )
+    return aliases
+
+
+def _clauses(sql: str) -> List[str]:
+    flat = " ".join(
+        token.normalized for token in sqlparse.parse(sql)[0].flatten() if token.is_keyword
+    )
+    found = ["WHERE"] if re.search(r"\bWHERE\b", flat) else []
+    found += [clause for clause in _CLAUSES if re.search(rf"\b{clause}\b", flat)]
+    if len(re.findall(r"\bSELECT\b", flat)) > 1:
+        found.append("SUBQUERY")
+    return found
+
+
+def _count_rows(connection: sqlite3.Connection, table: str) -> Optional[int]:
+    limit = settings.SQL_COUNT_LIMIT
+    try:
+        quoted = '"' + table.replace('"', '""') + '"'
+        return connection.execute(f"SELECT count(*) FROM (SELECT 1 FROM {quoted} LIMIT ?)", (limit + 1,)).fetchone()[0]
+    except sqlite3.Error:
+        return None
+
+
+def _findings(steps: List[Dict], rows: Dict[str, Optional[int]]) -> List[str]:
+    findings = []
+    for step in walk_steps(steps):
+        table = step.get("table")
+        operation = step["operation"]
+        if operation == "full_scan" and table in rows:
+            count = rows[table]
+            size = "" if count is None else (
+                f" ({settings.SQL_COUNT_LIMIT}+ rows)" if count > settings.SQL_COUNT_LIMIT else f" ({count} rows)"
+            )
+            findings.append(f"Full scan of {table}{size}: every row is read, no index narrows the search.")
+        elif operation == "index_seek":
+            covering = " The index covers every column needed, so the table itself is not read." if step["covering"] else ""
+            findings.append(f"{table} is searched with index {step['index']} on {step.get('constraint', '')}.{covering}")
+        elif operation == "rowid_seek":
+            findings.append(f"{table} is searched by its primary key, the fastest lookup.")
+        elif operation == "index_scan":
+            findings.append(f"{table} is read in the order of index {step['index']}, which avoids a sort.")
+        elif operation == "automatic_index":
+            findings.append(
+                f"SQLite builds a temporary index on {table} ({step['constraint']}) every time the query runs; "
+                "a permanent index on that column would save the work."
+            )
+        elif operation == "temp_btree":
+            findings.append(f"A temporary B-tree is built for {step['purpose']}: no index provides that order.")
+        elif operation == "subquery" and step["correlated"]:
+            findings.append(f"{step['detail'].capitalize()} runs once for every row of the outer query.")
+    return list(dict.fromkeys(findings))
+
+
+@traced_sql("explain")
+def explain_plan(session_id: str, sql_query: str) -> Dict:
+    """Return the structured plan of one statement without running it (blocking)"""
+
+    statements = split_script(_EXPLAIN_PREFIX.sub("", sql_query.strip()))
+    if len(statements) != 1:
+        return {"response": "error", "details": "give exactly one SQL statement to explain"}
+    sql = statements[0].rstrip(";")
+
+    try:
+        with session_databases.acquire(session_id) as (database, connection):
+            budget = new_query_budget()
+            started = time.perf_counter()
+            try:
+                with budget.guard(connection):
+                    plan = build_plan(connection, sql)
+                    tables = {
+                        row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+                    }
+                    rows = {
+                        step["table"]: _count_rows(connection, step["table"])
+                        for step in walk_steps(plan)
+                        if step["operation"] == "full_scan" and step.get("table") in tables
+                    }
+            except sqlite3.Error as e:
+                SQL_SECONDS.observe(time.perf_counter() - started, kind="explain", outcome="error")
+                return {"response": "error", "details": budget.exceeded or str(e)}
+            duration = time.perf_counter() - started
+            SQL_SECONDS.observe(duration, kind="explain", outcome="ok")
+    except Exception as e:
+        logger.error("Could not explain SQL for session %s: %s", session_id, e)
+        return {"response": "error", "details": str(e)}
+
+    parsed = sqlparse.parse(sql)[0]
+    return {
+        "response": "plan computed (the statement was not run)",
+        "statement_type": parsed.get_type(),
+        "sql": sqlparse.format(sql, reindent=True, keyword_case="upper"),
+        "tables": list(dict.fromkeys(table_aliases(parsed).values())),
+        "clauses": _clauses(sql),
+        "plan": plan,
+        "join_order": _join_order(plan),
+        "findings": _findings(plan, rows),
+        "duration_ms": round(duration * 1000, 3),
+    }
+
+
+async def explain_query_plan(sql_query: str, tool_context: ToolContext):
+    """
+    Compute how SQLite would run one SQL statement, without running it.
+    Returns the plan as a tree of steps (full scans, index seeks, temporary
+    B-trees for sorting, subqueries), the join order (outer loop first) and
+    findings about the performance of the query.
+    """
+
+    try:
+        return await sql_executor.run(explain_plan, get_sql_session_id(tool_context), sql_query)
+    except SqlBackendBusyError as e:
+        return {"response": "error", "details": str(e)}
@@ -0,0 +1,133 @@
+"""Compact description of a session database (tables, columns, row counts) for the agents.
+
+The digest is kept up to date by the SQL tools after every change: the
+structure is re-read only when ``PRAGMA schema_version`` moved, and only the
+rows of the table a statement wrote to are counted again. Agents get it in
+their request instead of discovering the tables with extra tool calls.
+"""
+
+import re
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional
+
+from settings import settings
+from logging_data.logging_config import get_backend_logger
+
+logger = get_backend_logger(__name__)
+
+# state key holding the digest of the conversation's database
+SCHEMA_DIGEST_KEY = "schema_digest"
+
+_NAME = r'(?:"[^"]+"|\[[^\]]+\]|`[^`]+`|[\w$]+)'
+_WRITE_TARGET = re.compile(
+    rf"^\s*(?:(?:INSERT|REPLACE)(?:\s+OR\s+\w+)?\s+INTO|UPDATE(?:\s+OR\s+\w+)?|DELETE\s+FROM)\s+"
+    rf"(?:{_NAME}\s*\.\s*)?({_NAME})",
+    re.IGNORECASE,
+)
+_DML = re.compile(r"^\s*(INSERT|REPLACE|UPDATE|DELETE|WITH)\b", re.IGNORECASE)
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def written_tables(statements: Iterable[str]) -> Optional[List[str]]:
+    """Tables the statements insert into, update or delete from; None when it cannot be told"""
+    tables = []
+    for statement in statements:
+        if not _DML.match(statement):
+            continue
+        target = _WRITE_TARGET.match(statement)
+        if target is None:
+            return None
+        tables.append(target.group(1).strip('"[]`'))
+    return tables
+
+
+class SchemaDigest:
+    """Tables, columns and row counts of one database, refreshed incrementally"""
+
+    def __init__(self):
+        self.text: Optional[str] = None
+        self._schema_version: Optional[int] = None
+        self._tables: Dict[str, str] = {}
+        self._rows: Dict[str, str] = {}
+        self._others: List[str] = []
+        self._has_triggers = False
+        self._lock = threading.Lock()
+
+    def _read_structure(self, connection: sqlite3.Connection) -> List[str]:
+        """Re-read tables, views and indexes; return the tables that are new"""
+        tables = {}
+        self._others = []
+        self._has_triggers = False
+        for kind, name, table in connection.execute(
+            "SELECT type, name, tbl_name FROM sqlite_master WHERE name NOT LIKE 'sqlite_%' ORDER BY rowid"
+        ):
+            if kind == "table":
+                tables[name] = self._describe_table(connection, name)
+            elif kind == "index":
+                columns = ", ".join(row[2] or "<expr>" for row in connection.execute(f"PRAGMA index_info({_quote(name)})"))
+                self._others.append(f"index {name} ON {table}({columns})")
+            elif kind == "view":
+                self._others.append(f"view {name}")
+            else:
+                self._has_triggers = True
+                self._others.append(f"trigger {name} ON {table}")
+        new = [name for name in tables if name not in self._tables]
+        self._tables = tables
+        self._rows = {name: count for name, count in self._rows.items() if name in tables}
+        return new
+
+    @staticmethod
+    def _describe_table(connection: sqlite3.Connection, name: str) -> str:
+        references = {
+            row[3]: f" -> {row[2]}" + (f".{row[4]}" if row[4] else "")
+            for row in connection.execute(f"PRAGMA foreign_key_list({_quote(name)})")
+        }
+        columns = []
+        for _, column, kind, not_null, _, primary_key in connection.execute(f"PRAGMA table_info({_quote(name)})"):
+            flags = (" PK" if primary_key else "") + (" NOT NULL" if not_null and not primary_key else "")
+            columns.append(f"{column} {kind or 'ANY'}{flags}{references.get(column, '')}")
+        return f"{name}({', '.join(columns)})"
+
+    @staticmethod
+    def _count_rows(connection: sqlite3.Connection, name: str) -> str:
+        limit = settings.SQL_COUNT_LIMIT
+        count = connection.execute(f"SELECT count(*) FROM (SELECT 1 FROM {_quote(name)} LIMIT ?)", (limit + 1,)).fetchone()[0]
+        return f"{limit}+ rows" if count > limit else f"{count} row" + ("" if count == 1 else "s")
+
+    def _render(self) -> str:
+        lines = [f"{description}: {self._rows.get(name, '? rows')}" for name, description in self._tables.items()]
+        lines += self._others
+        text, shown = "", 0
+        for line in lines:
+            if len(text) + len(line) + 1 > settings.SCHEMA_DIGEST_MAX_CHARS:
+                return text + f"... and {len(lines) - shown} more"
+            text += line + "\n"
+            shown += 1
+        return text.rstrip("\n")
+
+    def refresh(self, connection: sqlite3.Connection, tables: Optional[Iterable[str]] = None) -> Optional[str]:
+        """Bring the digest up to date after a change to ``tables`` (all of them when None) and return it"""
+        with self._lock:
+            try:
+                version = connection.execute("PRAGMA schema_version").fetchone()[0]
+                recount = list(tables) if tables is not None else None
+                if version != self._schema_version:
+                    new = self._read_structure(connection)
+                    self._schema_version = version
+                    if recount is not None:
+                        recount += new
+                # a trigger may write to any table
+                if recount is None or self._has_triggers:
+                    recount = list(self._tables)
+                # SQLite names are case insensitive
+                names = {name.lower(): name for name in self._tables}
+                for name in {names.get(name.lower()) for name in recount} - {None}:
+                    self._rows[name] = self._count_rows(connection, name)
+                self.text = self._render()
+            except sqlite3.Error as e:
+                logger.warning("Could not refresh the schema digest: %s", e)
+            return self.text
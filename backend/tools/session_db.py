@@ -0,0 +1,457 @@
+"""Per-session SQLite databases used by the db_interactions tool.
+
+In ``memory`` storage (one worker) every session database is an in-memory
+SQLite database, snapshotted to ``SQL_SNAPSHOT_DIR`` in the background once
+it changed and when it is evicted. In
+``file`` storage (several workers) the databases are SQLite files in that
+directory, shared by all workers, and so are the page tokens.
+"""
+
+import asyncio
+import hashlib
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from backend.tools.schema_digest import SchemaDigest
+from settings import settings
+from logging_data.logging_config import get_backend_logger
+
+logger = get_backend_logger(__name__)
+
+# state key under which the root agent pins the ADK session id, so that
+# sub-agents running behind AgentTool (in their own throw-away session)
+# still reach the database of the conversation they belong to
+SQL_SESSION_KEY = "sql_session_id"
+
+_SAFE_FILE_NAME = re.compile(r"^[A-Za-z0-9_-]{1,128}$")
+# pragmas that would lift the size cap or move files outside the session database
+_LOCKED_PRAGMAS = {"max_page_count", "temp_store_directory", "data_store_directory"}
+
+
+def _authorize(action: int, arg1: Optional[str], arg2: Optional[str], database: Optional[str],
+               source: Optional[str]) -> int:
+    """Authorizer of session connections: no ATTACH (VACUUM attaches too) and no changing the size cap"""
+    if action in (sqlite3.SQLITE_ATTACH, sqlite3.SQLITE_DETACH):
+        return sqlite3.SQLITE_DENY
+    if action == sqlite3.SQLITE_PRAGMA and (arg1 or "").lower() in _LOCKED_PRAGMAS and arg2 is not None:
+        return sqlite3.SQLITE_DENY
+    return sqlite3.SQLITE_OK
+
+
+class DatabaseBusyError(Exception):
+    """Raised when no connection of a session pool frees up in time"""
+
+
+class SharedPageTokens:
+    """Page tokens kept in a SQLite file, so any worker can serve the next page"""
+
+    def __init__(self, path: Path):
+        self._connection = sqlite3.connect(path, check_same_thread=False, timeout=settings.SQL_POOL_TIMEOUT)
+        self._lock = threading.Lock()
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode = WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS page_tokens (token TEXT PRIMARY KEY, session_id TEXT NOT NULL, "
+                "sql_command TEXT NOT NULL, row_offset INTEGER NOT NULL, created REAL NOT NULL)"
+            )
+            self._connection.execute("CREATE INDEX IF NOT EXISTS ix_page_tokens_session ON page_tokens (session_id, created)")
+
+    def add(self, session_id: str, sql_command: str, offset: int) -> str:
+        token = uuid.uuid4().hex[:12]
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT INTO page_tokens VALUES (?, ?, ?, ?, ?)", (token, session_id, sql_command, offset, time.time())
+            )
+            # keep only the newest tokens of the session
+            self._connection.execute(
+                "DELETE FROM page_tokens WHERE session_id = ? AND token NOT IN "
+                "(SELECT token FROM page_tokens WHERE session_id = ? ORDER BY created DESC LIMIT ?)",
+                (session_id, session_id, settings.SQL_MAX_PAGE_TOKENS),
+            )
+        return token
+
+    def pop(self, session_id: str, token: str) -> Optional[Tuple[str, int]]:
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                "SELECT sql_command, row_offset FROM page_tokens WHERE token = ? AND session_id = ?",
+                (token, session_id),
+            ).fetchone()
+            self._connection.execute("DELETE FROM page_tokens WHERE token = ?", (token,))
+        return (row[0], row[1]) if row else None
+
+    def delete_session(self, session_id: str):
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM page_tokens WHERE session_id = ?", (session_id,))
+
+
+class SessionDatabase:
+    """A SQLite database owned by a single ADK session.
+
+    Without ``database_path`` it is a named shared-cache memory database, so it
+    can be served by a small pool of connections; it lives as long as one of
+    them is open. When a snapshot path is given, it is restored from it on
+    creation; changes mark it dirty and ``flush`` writes it back, from the
+    manager's background flush or when it is evicted. With
+    ``database_path`` the connections open that file directly, which lets
+    several worker processes share the database.
+    """
+
+    def __init__(self, session_id: str, pool_size: int, snapshot_path: Optional[Path] = None,
+                 database_path: Optional[Path] = None, page_tokens: Optional[SharedPageTokens] = None):
+        self.session_id = session_id
+        self.pool_size = pool_size
+        self.snapshot_path = None if database_path else snapshot_path
+        self.database_path = database_path
+        self.page_tokens = page_tokens
+        if database_path is not None:
+            self.uri = f"file:{database_path}"
+        else:
+            self.uri = f"file:sql-teacher-{uuid.uuid4().hex}?mode=memory&cache=shared"
+        self.closed = False
+        # changed since the last snapshot
+        self.dirty = False
+        self.last_used = time.monotonic()
+        # tables, columns and row counts given to the agents, filled on first use
+        self.digest = SchemaDigest()
+        self._pages: "OrderedDict[str, Tuple[str, int]]" = OrderedDict()
+        # statements run in this process, most recent last: sql -> (runs, total seconds, slowest seconds)
+        self._history: "OrderedDict[str, Tuple[int, float, float]]" = OrderedDict()
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._opened: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._snapshot_lock = threading.Lock()
+        # shared-cache databases fail conflicting statements with SQLITE_LOCKED
+        # instead of waiting for the busy timeout, so writers take turns (and,
+        # in memory, readers too: they must not see an uncommitted script)
+        self.write_lock = threading.Lock()
+        connection = self._connect()
+        self._restore(connection)
+        self._idle.put(connection)
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.uri, uri=True, check_same_thread=False, timeout=settings.SQL_POOL_TIMEOUT)
+        if self.database_path is not None:
+            # readers and the writer of other workers do not block each other
+            connection.execute("PRAGMA journal_mode = WAL")
+            connection.execute("PRAGMA synchronous = NORMAL")
+        # cap how much memory a single session database may take, temporary tables included
+        for schema in ("main", "temp"):
+            page_size = connection.execute(f"PRAGMA {schema}.page_size").fetchone()[0]
+            connection.execute(f"PRAGMA {schema}.max_page_count = {settings.SQL_MAX_DB_MB * 1024 * 1024 // page_size}")
+        connection.setlimit(sqlite3.SQLITE_LIMIT_LENGTH, settings.SQL_MAX_VALUE_MB * 1024 * 1024)
+        # an attached database would escape the cap and, with file storage,
+        # could open the database of another session
+        connection.setlimit(sqlite3.SQLITE_LIMIT_ATTACHED, 0)
+        connection.set_authorizer(_authorize)
+        self._opened.append(connection)
+        return connection
+
+    def _restore(self, connection: sqlite3.Connection):
+        if self.snapshot_path is None or not self.snapshot_path.exists():
+            return
+        try:
+            source = sqlite3.connect(f"file:{self.snapshot_path}?mode=ro", uri=True)
+            try:
+                source.backup(connection)
+            finally:
+                source.close()
+            logger.info("Restored SQL database of session %s from %s", self.session_id, self.snapshot_path)
+        except sqlite3.Error as e:
+            logger.error("Could not restore SQL database of session %s: %s", self.session_id, e)
+
+    def mark_changed(self):
+        """Remember that the snapshot is out of date"""
+        if self.snapshot_path is not None:
+            self.dirty = True
+
+    def flush(self, timeout: float):
+        """Write the snapshot if the database changed since the last one"""
+        if not self.dirty or self.closed:
+            return
+        # writers hold the lock, so nothing changes between the backup and clearing the flag
+        if not self.write_lock.acquire(timeout=timeout):
+            logger.warning("SQL database of session %s is busy, snapshot postponed", self.session_id)
+            return
+        try:
+            connection = self.checkout(timeout)
+            try:
+                if self.snapshot(connection):
+                    self.dirty = False
+            finally:
+                self.checkin(connection)
+        except DatabaseBusyError:
+            logger.warning("SQL database of session %s is busy, snapshot postponed", self.session_id)
+        finally:
+            self.write_lock.release()
+
+    def snapshot(self, connection: sqlite3.Connection) -> bool:
+        """Write the database to its snapshot file with the online backup API"""
+        if self.snapshot_path is None:
+            return False
+        temporary = self.snapshot_path.with_name(f"{self.snapshot_path.name}.{uuid.uuid4().hex}.tmp")
+        with self._snapshot_lock:
+            try:
+                target = sqlite3.connect(temporary)
+                try:
+                    connection.backup(target)
+                finally:
+                    target.close()
+                # replace atomically, so a crash never leaves half a snapshot behind
+                os.replace(temporary, self.snapshot_path)
+                return True
+            except (sqlite3.Error, OSError) as e:
+                logger.error("Could not snapshot SQL database of session %s: %s", self.session_id, e)
+                temporary.unlink(missing_ok=True)
+                return False
+
+    def touch(self):
+        """Mark the database as recently used"""
+        self.last_used = time.monotonic()
+
+    def add_page_token(self, sql_command: str, offset: int) -> str:
+        """Remember where a paginated query stopped and return a token for it"""
+        if self.page_tokens is not None:
+            return self.page_tokens.add(self.session_id, sql_command, offset)
+        token = uuid.uuid4().hex[:12]
+        with self._lock:
+            self._pages[token] = (sql_command, offset)
+            while len(self._pages) > settings.SQL_MAX_PAGE_TOKENS:
+                self._pages.popitem(last=False)
+        return token
+
+    def pop_page_token(self, token: str) -> Optional[Tuple[str, int]]:
+        """Return the query and offset a token points to, if it is still known"""
+        if self.page_tokens is not None:
+            return self.page_tokens.pop(self.session_id, token)
+        with self._lock:
+            return self._pages.pop(token, None)
+
+    def record_query(self, sql_command: str, duration: float):
+        """Add a run of a statement to the query history the index advisor reads"""
+        key = " ".join(sql_command.split()).rstrip(";")
+        with self._lock:
+            runs, total, slowest = self._history.pop(key, (0, 0.0, 0.0))
+            self._history[key] = (runs + 1, total + duration, max(slowest, duration))
+            while len(self._history) > settings.SQL_HISTORY_SIZE:
+                self._history.popitem(last=False)
+
+    def query_history(self) -> List[Dict]:
+        """Return the recorded statements, the most expensive in total first"""
+        with self._lock:
+            history = list(self._history.items())
+        entries = [
+            {"sql": sql, "runs": runs, "total_ms": round(total * 1000, 3), "max_ms": round(slowest * 1000, 3)}
+            for sql, (runs, total, slowest) in history
+        ]
+        return sorted(entries, key=lambda entry: entry["total_ms"], reverse=True)
+
+    def checkout(self, timeout: float) -> sqlite3.Connection:
+        """Take a connection from the pool, opening a new one if allowed"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if len(self._opened) < self.pool_size:
+                return self._connect()
+
+        try:
+            return self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise DatabaseBusyError(
+                f"all {self.pool_size} connections of this session are busy, please retry"
+            ) from None
+
+    def checkin(self, connection: sqlite3.Connection):
+        """Give a connection back to the pool"""
+        if self.closed:
+            connection.close()
+        else:
+            self._idle.put(connection)
+
+    def close(self):
+        """Close idle connections; busy ones are closed when checked in"""
+        self.closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+class SessionDatabaseManager:
+    """Hands every session its own database, bounded by LRU eviction and idle TTL"""
+
+    def __init__(self, max_sessions: int, idle_ttl: float, pool_size: int, pool_timeout: float,
+                 snapshot_dir: Optional[str] = None, storage: str = "memory"):
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.pool_size = pool_size
+        self.pool_timeout = pool_timeout
+        self.snapshot_dir = Path(snapshot_dir) if snapshot_dir else None
+        if self.snapshot_dir is not None:
+            self.snapshot_dir.mkdir(parents=True, exist_ok=True)
+        if storage == "file" and self.snapshot_dir is None:
+            logger.warning("SQL_STORAGE=file needs SQL_SNAPSHOT_DIR, keeping the session databases in memory")
+            storage = "memory"
+        self.storage = storage
+        # dot-prefixed, so it can never collide with a session database
+        self.page_tokens = SharedPageTokens(self.snapshot_dir / ".page_tokens.db") if storage == "file" else None
+        self._databases: "OrderedDict[str, SessionDatabase]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> SessionDatabase:
+        """Return the database of a session, creating it on first access"""
+        with self._lock:
+            evicted = self._pop_expired()
+            database = self._databases.get(session_id)
+            if database is None:
+                path = self.snapshot_path(session_id)
+                if self.storage == "file":
+                    database = SessionDatabase(session_id, self.pool_size, database_path=path,
+                                               page_tokens=self.page_tokens)
+                else:
+                    database = SessionDatabase(session_id, self.pool_size, snapshot_path=path)
+                self._databases[session_id] = database
+                logger.info("Created SQL database for session %s", session_id)
+                while len(self._databases) > self.max_sessions:
+                    evicted.append(self._databases.popitem(last=False)[1])
+            else:
+                self._databases.move_to_end(session_id)
+            database.touch()
+
+        self._close(evicted)
+        return database
+
+    @contextmanager
+    def acquire(self, session_id: str, write: bool = False) -> Iterator[Tuple[SessionDatabase, sqlite3.Connection]]:
+        """Check out a connection to the database of a session for the duration of the block.
+
+        With ``write`` the block also holds the write lock of the session, so
+        statements that may write to the same database run one at a time. In
+        memory every block holds it: readers of a shared-cache database would
+        otherwise fail with SQLITE_LOCKED while a script transaction is open.
+        """
+        while True:
+            database = self.get(session_id)
+            exclusive = write or database.database_path is None
+            if exclusive and not database.write_lock.acquire(timeout=self.pool_timeout):
+                raise DatabaseBusyError("another statement of this session is still running, please retry")
+            try:
+                connection = database.checkout(self.pool_timeout)
+            except DatabaseBusyError:
+                if exclusive:
+                    database.write_lock.release()
+                raise
+            # the database may have been evicted between get() and checkout()
+            if not database.closed:
+                break
+            database.checkin(connection)
+            if exclusive:
+                database.write_lock.release()
+
+        try:
+            yield database, connection
+        finally:
+            database.checkin(connection)
+            if exclusive:
+                database.write_lock.release()
+
+    def snapshot_path(self, session_id: str) -> Optional[Path]:
+        """Return the file the database of a session is persisted to (or lives in), if any"""
+        if self.snapshot_dir is None:
+            return None
+        if not _SAFE_FILE_NAME.match(session_id):
+            session_id = hashlib.sha256(session_id.encode()).hexdigest()
+        return self.snapshot_dir / f"{session_id}.db"
+
+    def drop(self, session_id: str, delete_snapshot: bool = False):
+        """Discard the database of a session (and optionally its snapshot)"""
+        with self._lock:
+            database = self._databases.pop(session_id, None)
+        if database is not None:
+            if delete_snapshot:
+                database.dirty = False
+            self._close([database])
+        if delete_snapshot and self.snapshot_dir is not None:
+            path = self.snapshot_path(session_id)
+            for suffix in ("", "-wal", "-shm"):
+                path.with_name(path.name + suffix).unlink(missing_ok=True)
+            if self.page_tokens is not None:
+                self.page_tokens.delete_session(session_id)
+
+    def schema_digest(self, session_id: str) -> Optional[str]:
+        """Return the schema digest of a live database, without opening it if it is not"""
+        with self._lock:
+            database = self._databases.get(session_id)
+        return database.digest.text if database is not None else None
+
+    def live_files(self) -> Set[str]:
+        """Names of the snapshot (or database) files of the sessions open in this process"""
+        if self.snapshot_dir is None:
+            return set()
+        with self._lock:
+            session_ids = list(self._databases)
+        return {self.snapshot_path(session_id).name for session_id in session_ids}
+
+    def flush_snapshots(self):
+        """Write the snapshots of the databases changed since their last one (blocking)"""
+        with self._lock:
+            databases = [database for database in self._databases.values() if database.dirty]
+        for database in databases:
+            database.flush(self.pool_timeout)
+
+    async def flush_forever(self):
+        """Flush the snapshots every SQL_SNAPSHOT_INTERVAL seconds until cancelled"""
+        while True:
+            await asyncio.sleep(settings.SQL_SNAPSHOT_INTERVAL)
+            await asyncio.to_thread(self.flush_snapshots)
+
+    def stats(self) -> Dict[str, int]:
+        """Return the number of live databases and the configured bounds"""
+        with self._lock:
+            return {
+                "active_sessions": len(self._databases),
+                "max_sessions": self.max_sessions,
+                "file_storage": int(self.storage == "file"),
+            }
+
+    def __len__(self):
+        return len(self._databases)
+
+    def _pop_expired(self):
+        """Remove databases idle for longer than the TTL (caller holds the lock)"""
+        deadline = time.monotonic() - self.idle_ttl
+        expired = []
+        # the dict is kept in LRU order, so the oldest entries come first
+        for session_id, database in list(self._databases.items()):
+            if database.last_used > deadline:
+                break
+            expired.append(self._databases.pop(session_id))
+        return expired
+
+    def _close(self, databases):
+        for database in databases:
+            logger.info("Evicting SQL database for session %s", database.session_id)
+            database.flush(self.pool_timeout)
+            database.close()
+
+
+session_databases = SessionDatabaseManager(
+    max_sessions=settings.SQL_MAX_SESSIONS,
+    idle_ttl=settings.SQL_SESSION_TTL,
+    pool_size=settings.SQL_POOL_SIZE,
+    pool_timeout=settings.SQL_POOL_TIMEOUT,
+    snapshot_dir=settings.SQL_SNAPSHOT_DIR,
+    storage=settings.SQL_STORAGE,
+)
@@ -0,0 +1,80 @@
+"""Bounded worker pool that runs SQL off the event loop"""
+
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from settings import settings
+from logging_data.logging_config import get_backend_logger
+
+logger = get_backend_logger(__name__)
+
+
+class SqlBackendBusyError(Exception):
+    """Raised when too many SQL statements are already waiting for a worker"""
+
+
+class SqlExecutor:
+    """Runs blocking sqlite3 calls on a fixed number of worker threads.
+
+    At most ``max_pending`` calls may wait for a worker; further calls are
+    rejected right away instead of queueing without bound.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="sql-worker")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+        self._max_queue_depth = 0
+
+    async def run(self, func: Callable[..., Any], *args) -> Any:
+        """Run ``func(*args)`` on a worker thread and await its result"""
+        with self._lock:
+            if self._queued >= self.max_pending:
+                self._rejected += 1
+                logger.warning("SQL queue is full (%s pending), rejecting statement", self._queued)
+                raise SqlBackendBusyError("the SQL backend is busy right now, please retry in a moment")
+            self._queued += 1
+            self._max_queue_depth = max(self._max_queue_depth, self._queued)
+
+        loop = asyncio.get_running_loop()
+        # keep the caller's context (trace span, correlation id) on the worker thread
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(self._pool, functools.partial(context.run, self._call, func, args))
+
+    def _call(self, func, args):
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+        try:
+            return func(*args)
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._completed += 1
+
+    def stats(self) -> Dict[str, int]:
+        """Return queue-depth and throughput counters"""
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "queued": self._queued,
+                "running": self._running,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "max_queue_depth": self._max_queue_depth,
+            }
+
+
+sql_executor = SqlExecutor(
+    max_workers=settings.SQL_WORKERS,
+    max_pending=settings.SQL_MAX_PENDING,
+)
@@ -0,0 +1,227 @@
+"""Load test of the backend with simulated students and a stub LLM.
+
+Every simulated student creates a session and plays the scenario below
+through ``AsyncADKClient`` (the client behind the frontend's ``ADKService``):
+each message is streamed from ``/run_sse`` and followed by the incremental
+events refresh the chat does. By default the FastAPI app of ``main.py`` runs
+in-process with every agent model replaced by ``StubLlm``; with ``--base-url``
+the students talk to a running backend instead (start it with
+``python -m benchmarks.serve`` to keep the stub models). The in-process
+transport buffers responses, so ``message_first_event`` is only meaningful
+with ``--base-url``.
+
+    python -m benchmarks.load_test --students 50 --latency 0.3 --turns 2
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+SCENARIO = (
+    "Please design a table for students with a name and an age",
+    "run: CREATE TABLE IF NOT EXISTS students (id INTEGER PRIMARY KEY, name TEXT, age INTEGER)",
+    "run: INSERT INTO students (name, age) VALUES ('Ana', 21), ('Dan', 19), ('Ioana', 23)",
+    "SELECT name, age FROM students WHERE age > 20;",
+    "Explain the query plan of SELECT name FROM students WHERE age > 20 ORDER BY name",
+    "What is the difference between an INNER JOIN and a LEFT JOIN?",
+    "Give me a quiz about aggregate functions",
+)
+
+
+def _rss_bytes() -> int:
+    """Resident memory of this process (Linux), 0 where /proc is not available"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0
+
+
+def _percentile(values: List[float], percentile: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(percentile / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+class Recorder:
+    """Collects latencies per operation and errors"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    async def time(self, operation: str, coroutine):
+        started = time.perf_counter()
+        try:
+            return await coroutine
+        except Exception as e:
+            self.errors[f"{operation}: {type(e).__name__}"] += 1
+            return None
+        finally:
+            self.latencies[operation].append(time.perf_counter() - started)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        return {
+            operation: {
+                "count": len(values),
+                "mean": statistics.fmean(values),
+                "p50": _percentile(values, 50),
+                "p95": _percentile(values, 95),
+                "p99": _percentile(values, 99),
+                "max": max(values),
+            }
+            for operation, values in self.latencies.items()
+        }
+
+
+async def _send(client, session_id: str, message: str, recorder: Recorder):
+    """Stream one message like the chat does and record time to first event and to the end"""
+    started = time.perf_counter()
+    first = None
+    last_event = None
+    try:
+        async for event in client.stream_message(session_id, message):
+            if first is None:
+                first = time.perf_counter() - started
+            if event.get("error"):
+                raise RuntimeError(event["error"])
+            last_event = event
+    except Exception as e:
+        recorder.errors[f"message: {type(e).__name__}"] += 1
+        return None
+    recorder.latencies["message"].append(time.perf_counter() - started)
+    if first is not None:
+        recorder.latencies["message_first_event"].append(first)
+    return last_event
+
+
+async def _student(client, turns: int, recorder: Recorder):
+    session = await recorder.time("create_session", client.create_session())
+    if not session:
+        return
+    session_id = session["id"]
+    last_event = None
+    for _ in range(turns):
+        for message in SCENARIO:
+            last_event = await _send(client, session_id, message, recorder) or last_event
+            if last_event:
+                await recorder.time(
+                    "refresh_events",
+                    client.get_session_events(session_id, last_event.get("timestamp", 0), last_event.get("id", "")),
+                )
+    await recorder.time("session_summaries", client.get_session_summaries())
+
+
+def _in_process_client(latency: float, jitter: float):
+    """Build the app of main.py with stub models and a client talking to it over ASGI"""
+    import httpx
+
+    import main
+    from benchmarks.stub_llm import install_stub_models
+    from frontend.services.adk_service import AsyncADKClient
+    from settings import settings
+
+    # import the root agent under the name the ADK agent loader will use
+    sys.path.insert(0, main.AGENT_DIR)
+    from teacher_agent.agent import root_agent
+
+    install_stub_models(root_agent, latency, jitter)
+    client = AsyncADKClient("http://benchmark")
+    client.client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=main.app),
+        base_url="http://benchmark",
+        timeout=settings.HTTP_RUN_TIMEOUT,
+    )
+    return client
+
+
+async def run(args) -> Dict:
+    if args.base_url:
+        from frontend.services.adk_service import AsyncADKClient
+
+        client = AsyncADKClient(args.base_url)
+    else:
+        client = _in_process_client(args.latency, args.jitter)
+
+    recorder = Recorder()
+    rss_before = _rss_bytes()
+    started = time.perf_counter()
+    semaphore = asyncio.Semaphore(args.concurrency or args.students)
+
+    async def bounded_student():
+        async with semaphore:
+            await _student(client, args.turns, recorder)
+
+    await asyncio.gather(*(bounded_student() for _ in range(args.students)))
+    elapsed = time.perf_counter() - started
+    rss_after = _rss_bytes()
+
+    messages = len(recorder.latencies["message"])
+    report = {
+        "students": args.students,
+        "turns": args.turns,
+        "stub_latency": None if args.base_url else args.latency,
+        "elapsed_seconds": elapsed,
+        "messages": messages,
+        "throughput_messages_per_second": messages / elapsed if elapsed else 0.0,
+        "latency_seconds": recorder.summary(),
+        "errors": dict(recorder.errors),
+    }
+    if not args.base_url:
+        report["rss_bytes_per_session"] = max(rss_after - rss_before, 0) / args.students
+        if os.path.exists(os.environ["SESSION_DB"]):
+            report["session_db_bytes_per_session"] = os.path.getsize(os.environ["SESSION_DB"]) / args.students
+    return report
+
+
+def _print_report(report: Dict):
+    print(f"{report['students']} students x {report['turns']} scenario runs, "
+          f"{report['messages']} messages in {report['elapsed_seconds']:.1f}s "
+          f"({report['throughput_messages_per_second']:.2f} messages/s)")
+    print(f"{'operation':<22}{'count':>7}{'mean':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}")
+    for operation, stats in sorted(report["latency_seconds"].items()):
+        print(f"{operation:<22}{stats['count']:>7}" + "".join(
+            f"{stats[key]:>9.3f}" for key in ("mean", "p50", "p95", "p99", "max")))
+    if "rss_bytes_per_session" in report:
+        print(f"memory per session: {report['rss_bytes_per_session'] / 1024:.1f} KiB RSS, "
+              f"{report.get('session_db_bytes_per_session', 0) / 1024:.1f} KiB in the session store")
+    for error, count in report["errors"].items():
+        print(f"error {error}: {count}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--students", type=int, default=20, help="simulated students")
+    parser.add_argument("--concurrency", type=int, default=0, help="students active at once (default: all)")
+    parser.add_argument("--turns", type=int, default=1, help="times each student plays the scenario")
+    parser.add_argument("--latency", type=float, default=0.5, help="stub model latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.1, help="random +/- added to the latency")
+    parser.add_argument("--base-url", default="", help="benchmark a running backend instead")
+    parser.add_argument("--json", default="", help="also write the report to this file")
+    args = parser.parse_args()
+
+    if not args.base_url:
+        # a throw-away store, unless the caller points the backend elsewhere
+        workdir = tempfile.mkdtemp(prefix="sql-teacher-bench-")
+        os.environ.setdefault("SESSION_DB", os.path.join(workdir, "session.db"))
+        os.environ.setdefault("SQL_SNAPSHOT_DIR", "")
+        os.environ.setdefault("JANITOR_ENABLED", "false")
+
+    report = asyncio.run(run(args))
+    _print_report(report)
+    if args.json:
+        with open(args.json, "w") as output:
+            json.dump(report, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
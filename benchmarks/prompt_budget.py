@@ -0,0 +1,122 @@
+"""Token budget of the prompt every agent re-sends on each model call.
+
+For every agent reachable from the root agent, measures the static prefix of
+its requests: the identity line ADK adds, the instruction and the tool
+declarations. Tokens are estimated from the size (about 4 characters per
+token) unless ``--count-tokens`` asks the model's ``count_tokens`` API, which
+needs the usual Gemini credentials. ``--max-tokens`` makes the command fail
+when an agent goes over budget.
+
+    python -m benchmarks.prompt_budget --count-tokens
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from typing import Dict, Iterator, List, Optional
+
+from google.adk.agents import LlmAgent
+from google.adk.tools import AgentTool
+
+from backend.teacher_agent.context_cache import estimate_tokens
+from settings import settings
+
+
+def iter_agents(agent: LlmAgent) -> Iterator[LlmAgent]:
+    """The agent and every agent reachable from it through sub-agents or agent tools, once each"""
+    seen = set()
+    stack = [agent]
+    while stack:
+        current = stack.pop()
+        if current.name in seen or not isinstance(current, LlmAgent):
+            continue
+        seen.add(current.name)
+        yield current
+        stack.extend(reversed(current.sub_agents))
+        stack.extend(reversed([tool.agent for tool in current.tools if isinstance(tool, AgentTool)]))
+
+
+async def prompt_parts(agent: LlmAgent) -> Dict[str, str]:
+    """Texts of the static prefix of the agent's requests, by part"""
+    identity = f'You are an agent. Your internal name is "{agent.name}".'
+    if agent.description:
+        identity += f' The description about you is "{agent.description}"'
+    declarations = []
+    for tool in await agent.canonical_tools():
+        declaration = tool._get_declaration()
+        if declaration is not None:
+            declarations.append(declaration.model_dump_json(exclude_none=True))
+    instruction = agent.instruction if isinstance(agent.instruction, str) else ""
+    return {"identity": identity, "instruction": instruction, "tools": "\n".join(declarations)}
+
+
+class TokenCounter:
+    """Counts with the count_tokens API when asked to, otherwise estimates"""
+
+    def __init__(self, use_api: bool):
+        self.use_api = use_api
+        self.method = "count_tokens" if use_api else "estimate"
+        self._client = None
+
+    def count(self, model: str, text: str) -> int:
+        if not text:
+            return 0
+        if self.use_api:
+            try:
+                if self._client is None:
+                    from google import genai
+
+                    self._client = genai.Client()
+                return self._client.models.count_tokens(model=model, contents=text).total_tokens or 0
+            except Exception as e:
+                print(f"count_tokens failed ({e}), estimating instead", file=sys.stderr)
+                self.use_api = False
+                self.method = "estimate"
+        return estimate_tokens(text)
+
+
+async def measure(root: LlmAgent, counter: TokenCounter) -> List[Dict]:
+    rows = []
+    for agent in iter_agents(root):
+        model = agent.model if isinstance(agent.model, str) else agent.model.model
+        parts = await prompt_parts(agent)
+        row = {"agent": agent.name, "model": model}
+        for name, text in parts.items():
+            row[f"{name}_chars"] = len(text)
+            row[f"{name}_tokens"] = counter.count(model, text)
+        row["total_tokens"] = sum(row[f"{name}_tokens"] for name in parts)
+        row["cacheable"] = row["total_tokens"] >= settings.CONTEXT_CACHE_MIN_TOKENS
+        rows.append(row)
+    return rows
+
+
+def _print_rows(rows: List[Dict], method: str, max_tokens: Optional[int]):
+    print(f"{'agent':<24}{'instruction':>13}{'tools':>8}{'identity':>10}{'total':>8}  cacheable  ({method})")
+    for row in rows:
+        over = "  OVER BUDGET" if max_tokens and row["total_tokens"] > max_tokens else ""
+        print(f"{row['agent']:<24}{row['instruction_tokens']:>13}{row['tools_tokens']:>8}"
+              f"{row['identity_tokens']:>10}{row['total_tokens']:>8}  {'yes' if row['cacheable'] else 'no':<9}{over}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--count-tokens", action="store_true", help="count with the model API instead of estimating")
+    parser.add_argument("--max-tokens", type=int, default=0, help="fail if an agent's prefix is larger")
+    parser.add_argument("--json", default="", help="also write the measures to this file")
+    args = parser.parse_args()
+
+    from backend.teacher_agent.agent import root_agent
+
+    counter = TokenCounter(args.count_tokens)
+    rows = asyncio.run(measure(root_agent, counter))
+    _print_rows(rows, counter.method, args.max_tokens)
+    if args.json:
+        with open(args.json, "w") as output:
+            json.dump({"method": counter.method, "agents": rows}, output, indent=2)
+    if args.max_tokens and any(row["total_tokens"] > args.max_tokens for row in rows):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
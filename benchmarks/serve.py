@@ -0,0 +1,25 @@
+"""Run the backend of main.py with every agent model replaced by StubLlm.
+
+    STUB_LLM_LATENCY=0.3 python -m benchmarks.serve
+    python -m benchmarks.load_test --base-url http://localhost:8080
+"""
+
+import os
+import sys
+
+import uvicorn
+
+import main
+from benchmarks.stub_llm import install_stub_models
+
+if __name__ == "__main__":
+    # import the root agent under the name the ADK agent loader will use
+    sys.path.insert(0, main.AGENT_DIR)
+    from teacher_agent.agent import root_agent
+
+    install_stub_models(
+        root_agent,
+        latency=float(os.getenv("STUB_LLM_LATENCY", "0.5")),
+        jitter=float(os.getenv("STUB_LLM_JITTER", "0.1")),
+    )
+    uvicorn.run(main.app, host="0.0.0.0", port=int(os.getenv("PORT", "8080")))
@@ -0,0 +1,104 @@
+"""Deterministic stand-in for Gemini used by the benchmarks.
+
+Every agent gets its own ``StubLlm`` that waits a configurable latency and
+then answers like the real agent would in the benchmark scenario: the root
+agent delegates to the sub-agent a message asks for, the memory agent calls
+``db_interactions`` with the SQL of its request, the query explainer calls
+``explain_query_plan``, the other agents answer with text. Token usage is
+estimated from the request size, so the token metrics stay meaningful.
+"""
+
+import asyncio
+import random
+import re
+from typing import AsyncGenerator, Optional
+
+from google.adk.agents import LlmAgent
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+from google.adk.tools import AgentTool
+from google.genai import types
+
+_RUN_PREFIX = re.compile(r"^\s*run:\s*", re.IGNORECASE)
+
+
+def _text_response(text: str, llm_request: LlmRequest) -> LlmResponse:
+    return _response(types.Part(text=text), llm_request)
+
+
+def _call_response(name: str, args: dict, llm_request: LlmRequest) -> LlmResponse:
+    return _response(types.Part(function_call=types.FunctionCall(name=name, args=args)), llm_request)
+
+
+def _response(part: types.Part, llm_request: LlmRequest) -> LlmResponse:
+    prompt_chars = len(str(llm_request.config.system_instruction or ""))
+    prompt_chars += sum(len(part.text or "") for content in llm_request.contents for part in content.parts or [])
+    return LlmResponse(
+        content=types.Content(role="model", parts=[part]),
+        usage_metadata=types.GenerateContentResponseUsageMetadata(
+            prompt_token_count=prompt_chars // 4 + 1,
+            candidates_token_count=len(part.text or "") // 4 + 8,
+        ),
+    )
+
+
+class StubLlm(BaseLlm):
+    """Answers after ``latency`` (+/- ``jitter``) seconds, without any network call"""
+
+    model: str = "stub-llm"
+    agent_name: str = ""
+    latency: float = 0.5
+    jitter: float = 0.0
+
+    async def generate_content_async(self, llm_request: LlmRequest, stream: bool = False
+                                     ) -> AsyncGenerator[LlmResponse, None]:
+        delay = self.latency + random.uniform(-self.jitter, self.jitter)
+        await asyncio.sleep(max(delay, 0))
+        yield self._answer(llm_request)
+
+    def _answer(self, llm_request: LlmRequest) -> LlmResponse:
+        last = llm_request.contents[-1] if llm_request.contents else None
+        parts = (last.parts or []) if last else []
+        response = next((part.function_response for part in parts if part.function_response), None)
+        if response is not None:
+            return _text_response(f"Here is the outcome of {response.name}: {str(response.response)[:200]}",
+                                  llm_request)
+
+        text = " ".join(part.text for part in parts if part.text)
+        if self.agent_name == "memory_agent":
+            return _call_response("db_interactions", {"sql_command": _RUN_PREFIX.sub("", text)}, llm_request)
+        if self.agent_name == "schema_designer_agent":
+            return _text_response(
+                "```sql\nCREATE TABLE students (id INTEGER PRIMARY KEY, name TEXT, age INTEGER);\n```", llm_request
+            )
+        if self.agent_name == "query_explainer_agent":
+            return _call_response("explain_query_plan", {"sql_query": text}, llm_request)
+        if self.agent_name == "quiz_agent":
+            return _text_response("Question: what does SELECT COUNT(*) return? A) rows B) a number", llm_request)
+
+        tool = self._pick_tool(text)
+        if tool is not None:
+            return _call_response(tool, {"request": text}, llm_request)
+        return _text_response("Good question! A JOIN combines rows of two tables on a condition.", llm_request)
+
+    @staticmethod
+    def _pick_tool(text: str) -> Optional[str]:
+        lowered = text.lower()
+        if _RUN_PREFIX.match(text):
+            return "memory_agent"
+        if "quiz" in lowered:
+            return "quiz_agent"
+        if "plan" in lowered:
+            return "query_explainer_agent"
+        if "design" in lowered:
+            return "schema_designer_agent"
+        return None
+
+
+def install_stub_models(agent: LlmAgent, latency: float, jitter: float = 0.0):
+    """Replace the model of the agent and of every agent reachable from it"""
+    agent.model = StubLlm(agent_name=agent.name, latency=latency, jitter=jitter)
+    children = list(agent.sub_agents)
+    children += [tool.agent for tool in agent.tools if isinstance(tool, AgentTool)]
+    for child in children:
+        if isinstance(child, LlmAgent) and not isinstance(child.model, StubLlm):
+            install_stub_models(child, latency, jitter)
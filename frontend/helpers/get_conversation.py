@@ -1,32 +1,82 @@
 """Helper functions"""
+from typing import Dict, Iterable, Iterator, Optional
 
 
-def get_conversations(session):
-    """Extract and format conversations from session data"""
+class TurnBuilder:
+    """Group session events into conversation turns in a single pass.
+
+    All events of one invocation (the user message, the tool calls and the
+    model answers) belong to the same turn. Events can be fed in several
+    batches; a turn that is still running when a batch ends is completed by
+    the next one.
+    """
+
+    def __init__(self):
+        self.turns: Dict[int, Dict] = {}
+        self._index_by_invocation: Dict[str, int] = {}
+
+    def _turn_for(self, event: Dict) -> Dict:
+        invocation_id = event.get("invocationId") or event.get("id")
+        index = self._index_by_invocation.get(invocation_id)
+        if index is None:
+            index = len(self.turns)
+            self._index_by_invocation[invocation_id] = index
+            self.turns[index] = {"invocation_id": invocation_id, "tool_calls": []}
+        return self.turns[index]
+
+    def _add_event(self, event: Dict) -> Optional[Dict]:
+        """Add one event to its turn and return the turn, or None for events without a message"""
+        content = event.get("content")
+        # partial chunks are repeated by the final event, state-only events have no content
+        if event.get("partial") or not content or not content.get("parts"):
+            return None
 
-    conversation_info = []
+        turn = self._turn_for(event)
+        role = "user" if content.get("role") == "user" else "model"
+        for part in content["parts"]:
+            if part.get("text") and not part.get("thought"):
+                turn[role] = f"{turn[role]}\n\n{part['text']}" if role in turn else part["text"]
+            elif "functionCall" in part:
+                call = part["functionCall"]
+                turn["tool_calls"].append({"name": call.get("name"), "args": call.get("args")})
+            elif "functionResponse" in part:
+                name = part["functionResponse"].get("name")
+                for call in turn["tool_calls"]:
+                    if call["name"] == name and "response" not in call:
+                        call["response"] = part["functionResponse"].get("response")
+                        break
+        return turn
 
-    for conversation in session["events"]:
-        if "text" in conversation["content"]["parts"][0]:
-            conversation_info.append({
-                conversation["content"]["role"]: conversation["content"]["parts"][0]["text"]
-            })
+    def add(self, events: Iterable[Dict]):
+        """Add events to the turns"""
+        for event in events:
+            self._add_event(event)
 
-    merged = {}
-    for i in range(0, len(conversation_info), 2):
-        if i + 1 < len(conversation_info):
-            merged[i // 2] = {**conversation_info[i], **conversation_info[i + 1]}
-        else:
-            merged[i // 2] = conversation_info[i]
+    def feed(self, events: Iterable[Dict]) -> Iterator[Dict]:
+        """Consume events and yield the turn each of them was added to"""
+        for event in events:
+            turn = self._add_event(event)
+            if turn is not None:
+                yield turn
 
-    return merged
+
+def get_conversations(session):
+    """Extract and format conversations from session data"""
+
+    builder = TurnBuilder()
+    builder.add(session.get("events") or [] if session else [])
+    return builder.turns
 
 
 def get_first_user_question(session):
     """Return the first 20 chars from the
     first user question in a session"""
-    if session["events"]:
-        if "text" in session["events"][0]["content"]["parts"][0]:
-            return session["events"][0]["content"]["parts"][0]["text"][0:20]
-
-
+    if not session:
+        return None
+    for event in session.get("events") or []:
+        content = event.get("content") or {}
+        if content.get("role") == "user":
+            for part in content.get("parts") or []:
+                if part.get("text"):
+                    return part["text"][0:20]
+    return None
@@ -1,83 +1,275 @@
 """Services for consuming the API endpoints"""
-import requests
-import streamlit as st
+import asyncio
+import atexit
+import importlib.util
+import json
+import queue
+import threading
+import httpx
 from settings import settings
-from typing import Dict, List
+from logging_data.logging_config import correlation_id
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
 import logging
 
 
+class AsyncADKClient:
+    """Async client for the Google ADK API.
+
+    One keep-alive connection pool is shared by all calls; idempotent requests
+    are retried on transport errors and every call has a timeout.
+    """
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+        http2 = settings.HTTP2 and importlib.util.find_spec("h2") is not None
+        self.client = httpx.AsyncClient(
+            base_url=base_url,
+            http2=http2,
+            timeout=httpx.Timeout(settings.HTTP_TIMEOUT, connect=settings.HTTP_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_MAX_CONNECTIONS,
+                keepalive_expiry=60,
+            ),
+            # retries failed connection attempts, for every method
+            transport=httpx.AsyncHTTPTransport(http2=http2, retries=settings.HTTP_RETRIES),
+            event_hooks={"request": [self._add_request_id]},
+        )
+        self._sessions_url = f"/apps/{settings.APP_NAME}/users/{settings.USER_ID}/sessions"
+
+    @staticmethod
+    async def _add_request_id(request: httpx.Request):
+        """Forward the correlation id of the caller, so backend logs can be matched with ours"""
+        request_id = correlation_id.get()
+        if request_id != "-":
+            request.headers["X-Request-ID"] = request_id
+
+    async def _get(self, url: str, params: Optional[Dict] = None) -> httpx.Response:
+        """GET with retries on timeouts and dropped connections"""
+        for attempt in range(settings.HTTP_RETRIES + 1):
+            try:
+                response = await self.client.get(url, params=params)
+                response.raise_for_status()
+                return response
+            except (httpx.TimeoutException, httpx.TransportError) as e:
+                if attempt == settings.HTTP_RETRIES:
+                    raise
+                logging.warning(f"Retrying GET {url} after error: {e}")
+                await asyncio.sleep(0.2 * 2 ** attempt)
+
+    async def create_session(self) -> Dict:
+        response = await self.client.post(f"{self._sessions_url}/{settings.get_session_id()}")
+        logging.info(f"Create session response status: {response.status_code}")
+        response.raise_for_status()
+        return response.json()
+
+    async def get_session_by_id(self, session_id: str) -> Dict:
+        return (await self._get(f"{self._sessions_url}/{session_id}")).json()
+
+    async def get_session_events(self, session_id: str, after: float, after_event_id: str) -> List[Dict]:
+        params = {"after": after, "after_event_id": after_event_id}
+        return (await self._get(f"{self._sessions_url}/{session_id}/events", params)).json()["events"]
+
+    async def get_sessions(self) -> List[Dict]:
+        return (await self._get(self._sessions_url)).json()
+
+    async def get_sessions_by_ids(self, session_ids: List[str]) -> List[Dict]:
+        """Fetch several sessions concurrently, at most HTTP_MAX_CONCURRENCY at a time"""
+        semaphore = asyncio.Semaphore(settings.HTTP_MAX_CONCURRENCY)
+
+        async def fetch(session_id):
+            async with semaphore:
+                try:
+                    return await self.get_session_by_id(session_id)
+                except httpx.HTTPError as e:
+                    logging.error(f"Error getting session {session_id}: {e}")
+                    return {"id": session_id, "events": []}
+
+        return await asyncio.gather(*(fetch(session_id) for session_id in session_ids))
+
+    async def get_session_summaries(self) -> List[Dict]:
+        url = f"/apps/{settings.APP_NAME}/users/{settings.USER_ID}/session-summaries"
+        return (await self._get(url)).json()
+
+    def _run_payload(self, session_id: str, message: str, streaming: bool = False) -> Dict:
+        return {
+            "appName": settings.APP_NAME,
+            "userId": settings.USER_ID,
+            "sessionId": session_id,
+            "newMessage": {
+                "role": "user",
+                "parts": [{"text": message}]
+            },
+            "streaming": streaming,
+        }
+
+    async def send_message(self, session_id: str, message: str) -> Dict:
+        response = await self.client.post(
+            "/run", json=self._run_payload(session_id, message), timeout=settings.HTTP_RUN_TIMEOUT
+        )
+        response.raise_for_status()
+        return response.json()
+
+    async def stream_message(self, session_id: str, message: str) -> AsyncIterator[Dict]:
+        async with self.client.stream(
+            "POST", "/run_sse", json=self._run_payload(session_id, message, streaming=True),
+            timeout=settings.HTTP_RUN_TIMEOUT,
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if line.startswith("data:"):
+                    yield json.loads(line[len("data:"):])
+
+    async def delete_session(self, session_id: str):
+        response = await self.client.delete(f"{self._sessions_url}/{session_id}")
+        response.raise_for_status()
+        return response.json()
+
+    async def aclose(self):
+        """Close the connection pool"""
+        await self.client.aclose()
+
+
+_shared: Optional[Tuple[asyncio.AbstractEventLoop, threading.Thread, AsyncADKClient]] = None
+_shared_lock = threading.Lock()
+
+
+async def _create_client(base_url: str) -> AsyncADKClient:
+    return AsyncADKClient(base_url)
+
+
+def _shared_client() -> Tuple[asyncio.AbstractEventLoop, AsyncADKClient]:
+    """Start the event loop thread and the client every browser session uses, once per process"""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name="adk-client", daemon=True)
+            thread.start()
+            client = asyncio.run_coroutine_threadsafe(_create_client(settings.BASE_URL), loop).result()
+            _shared = (loop, thread, client)
+        loop, _, client = _shared
+        return loop, client
+
+
+def close_shared_client():
+    """Close the connections of the shared client and stop its event loop (on shutdown)"""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            return
+        loop, thread, client = _shared
+        _shared = None
+
+    async def shutdown():
+        await client.aclose()
+        # threads the loop started to resolve host names
+        await loop.shutdown_default_executor()
+
+    try:
+        asyncio.run_coroutine_threadsafe(shutdown(), loop).result(timeout=settings.HTTP_CONNECT_TIMEOUT)
+    except Exception as e:
+        logging.warning(f"Could not close the ADK client: {e}")
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(timeout=settings.HTTP_CONNECT_TIMEOUT)
+    if not thread.is_alive():
+        loop.close()
+
+
+atexit.register(close_shared_client)
+
+
 class ADKService:
-    """Service class for Google ADK API interactions"""
+    """Service class for Google ADK API interactions.
+
+    Synchronous facade over AsyncADKClient for Streamlit. Every browser session
+    gets its own ADKService, but they all share one client (and its connection
+    pool) living on an event loop in a background thread of the process.
+    """
 
     def __init__(self):
         self.base_url = settings.BASE_URL
         logging.info(f"ADKService initialized with base URL: {self.base_url}")
-        self.session = requests.Session()
+        self._loop, self.client = _shared_client()
+
+    def _run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
 
     def create_session(self) -> Dict:
         """Create a new conversation session"""
         try:
-            response = self.session.post(
-                f"{self.base_url}/apps/{settings.APP_NAME}/users/{settings.USER_ID}/sessions/{settings.get_session_id()}"
-            )
-            logging.info(f"Create session response status: {response.status_code}")
-            response.raise_for_status()
-            return response.json()
-        except requests.RequestException as e:
+            return self._run(self.client.create_session())
+        except (httpx.HTTPError, ValueError) as e:
             logging.error(f"Error creating session: {e}")
             return {}
 
     def get_session_by_id(self, session_id: str) -> List[Dict]:
         """Get a specific session by session id"""
         try:
-            response = self.session.get(
-                f"{self.base_url}/apps/{settings.APP_NAME}/users/{settings.USER_ID}/sessions/{session_id}"
-            )
-            response.raise_for_status()
-            return response.json()
-        except requests.RequestException as e:
+            return self._run(self.client.get_session_by_id(session_id))
+        except (httpx.HTTPError, ValueError) as e:
+            logging.error(f"Error getting session {session_id}: {e}")
             return []
 
+    def get_session_events(self, session_id: str, after: float, after_event_id: str) -> Optional[List[Dict]]:
+        """Get the events of a session that came after the given event.
+        Returns None if they cannot be fetched incrementally."""
+        try:
+            return self._run(self.client.get_session_events(session_id, after, after_event_id))
+        except (httpx.HTTPError, ValueError, KeyError) as e:
+            logging.error(f"Error getting new events of session {session_id}: {e}")
+            return None
+
     def get_sessions(self) -> List[Dict]:
         """Get all sessions"""
         try:
-            response = self.session.get(
-                f"{self.base_url}/apps/{settings.APP_NAME}/users/{settings.USER_ID}/sessions"
-            )
-            response.raise_for_status()
-            return response.json()
-        except requests.RequestException as e:
+            return self._run(self.client.get_sessions())
+        except (httpx.HTTPError, ValueError) as e:
+            logging.error(f"Error getting sessions: {e}")
             return []
 
+    def get_sessions_by_ids(self, session_ids: List[str]) -> List[Dict]:
+        """Get several sessions with concurrent requests"""
+        return self._run(self.client.get_sessions_by_ids(session_ids))
 
+    def get_session_summaries(self) -> Optional[List[Dict]]:
+        """Get id, title, last update time and turn count of all sessions in one call.
+        Returns None if the backend does not provide the summaries."""
+        try:
+            return self._run(self.client.get_session_summaries())
+        except (httpx.HTTPError, ValueError) as e:
+            logging.error(f"Error getting session summaries: {e}")
+            return None
 
     def send_message(self, session_id: str, message: str) -> Dict:
         """Send a message to an agent in a session"""
-
         try:
-            payload = {
-                "appName": settings.APP_NAME,
-                "userId": settings.USER_ID,
-                "sessionId": session_id,
-                "newMessage": {
-                    "role": "user",
-                    "parts": [{"text": message}]
-                }
-            }
-            response = self.session.post(f"{self.base_url}/run", json=payload)
-            response.raise_for_status()
-            return response.json()
-        except requests.RequestException as e:
+            return self._run(self.client.send_message(session_id, message))
+        except (httpx.HTTPError, ValueError) as e:
             return {"error": str(e)}
 
+    def stream_message(self, session_id: str, message: str) -> Iterator[Dict]:
+        """Send a message and yield the agent events as the server streams them (SSE)"""
+        events = queue.Queue()
+        done = object()
+
+        async def pump():
+            try:
+                async for event in self.client.stream_message(session_id, message):
+                    events.put(event)
+            except (httpx.HTTPError, ValueError) as e:
+                logging.error(f"Error streaming message: {e}")
+                events.put({"error": str(e)})
+            finally:
+                events.put(done)
+
+        asyncio.run_coroutine_threadsafe(pump(), self._loop)
+        while (event := events.get()) is not done:
+            yield event
+
     def delete_session(self, session_id: str):
         """Delete a specific session"""
         try:
-            response = self.session.delete(
-                f"{self.base_url}/apps/{settings.APP_NAME}/users/{settings.USER_ID}/sessions/{session_id}"
-            )
-            response.raise_for_status()
-            return response.json()
-        except requests.RequestException as e:
+            return self._run(self.client.delete_session(session_id))
+        except (httpx.HTTPError, ValueError) as e:
             return {"error": str(e)}
-
@@ -1,16 +1,19 @@
+import logging
+import uuid
 import streamlit as st
 from typing import Optional
 from frontend.ui.components.base import BaseComponent
 from frontend.services.adk_service import ADKService
-from frontend.helpers.get_conversation import get_conversations, get_first_user_question
+from frontend.helpers.get_conversation import TurnBuilder, get_first_user_question
 from frontend.helpers.terms import terms_and_conditions
-from logging_data.logging_config import get_frontend_logger
+from logging_data.logging_config import correlation_id, get_frontend_logger
 
 
 logger = get_frontend_logger(__name__)
 
 logger.info("Components module loaded")
-logger.debug(f"Session state keys: {list(st.session_state.keys())}")
+if logger.isEnabledFor(logging.DEBUG):
+    logger.debug("Session state keys: %s", list(st.session_state.keys()))
 
 class SidebarComponent(BaseComponent):
     """Sidebar component for server configuration"""
@@ -113,16 +116,16 @@ class SessionManagerComponent(BaseComponent):
     def _load_sessions(self):
         """Load all sessions from the service"""
         try:
-            self.logger.info("Fetching sessions from ADK service")
-            sessions = st.session_state.adk_client.get_sessions()
-            self.logger.info(f"Retrieved {len(sessions)} sessions")
-            
-            session_ids = [session["id"] for session in sessions]
+            self.logger.info("Fetching session summaries from ADK service")
+            summaries = st.session_state.adk_client.get_session_summaries()
+            if summaries is None:
+                summaries = self._summaries_from_sessions()
+            self.logger.info(f"Retrieved {len(summaries)} sessions")
 
-            all_sessions = [st.session_state.adk_client.get_session_by_id(session["id"]) for session in sessions]
+            session_ids = [summary["id"] for summary in summaries]
             session_conversations = [
-                get_first_user_question(session) or f"New session {session['id'][:8]}..." 
-                for session in all_sessions
+                (summary["title"] or "")[0:20] or f"New session {summary['id'][:8]}..."
+                for summary in summaries
             ]
 
             session_ids.insert(0, None)
@@ -130,11 +133,21 @@ class SessionManagerComponent(BaseComponent):
 
             st.session_state.all_session_ids = session_ids
             st.session_state.all_session_conversations = session_conversations
-            self.logger.debug(f"Loaded session IDs: {session_ids}")
+            self.logger.debug("Loaded session IDs: %s", session_ids)
         except Exception as e:
             self.logger.error(f"Error loading sessions: {e}", exc_info=True)
             st.error(f"Error loading sessions: {e}")
 
+    def _summaries_from_sessions(self):
+        """Build the summaries from full sessions, for backends without the summary endpoint"""
+        self.logger.warning("Session summaries unavailable, fetching every session")
+        sessions = st.session_state.adk_client.get_sessions()
+        all_sessions = st.session_state.adk_client.get_sessions_by_ids([session["id"] for session in sessions])
+        return [
+            {"id": session["id"], "title": get_first_user_question(full_session)}
+            for session, full_session in zip(sessions, all_sessions)
+        ]
+
     def _create_new_session(self):
         """Create a new conversation session"""
         try:
@@ -180,6 +193,13 @@ class ChatComponent(BaseComponent):
             st.session_state.cached_conversation = None
         if 'cached_session_id' not in st.session_state:
             st.session_state.cached_session_id = None
+        # timestamp and id of the last event in the cached conversation
+        if 'cached_turn_builder' not in st.session_state:
+            st.session_state.cached_turn_builder = None
+        if 'cached_last_event' not in st.session_state:
+            st.session_state.cached_last_event = None
+        if 'conversation_stale' not in st.session_state:
+            st.session_state.conversation_stale = False
 
     def render(self):
         if not st.session_state.adk_client:
@@ -195,6 +215,42 @@ class ChatComponent(BaseComponent):
 
         self._render_chat_input()
 
+    @staticmethod
+    def _last_event(events, default):
+        if not events:
+            return default
+        return events[-1]["timestamp"], events[-1]["id"]
+
+    def _fetch_conversation(self, session_id: str):
+        """Download the whole session and rebuild the cached conversation"""
+        self.logger.info(f"Fetching conversation for session: {session_id}")
+        selected_session = st.session_state.adk_client.get_session_by_id(session_id)
+        events = selected_session.get("events") if selected_session else None
+
+        builder = TurnBuilder()
+        builder.add(events or [])
+        st.session_state.cached_turn_builder = builder
+        st.session_state.cached_conversation = builder.turns
+        st.session_state.cached_session_id = session_id
+        st.session_state.cached_last_event = self._last_event(events, None)
+
+    def _sync_conversation(self, session_id: str):
+        """Append the events that came after the cached ones"""
+        if st.session_state.cached_last_event is None or st.session_state.cached_turn_builder is None:
+            self._fetch_conversation(session_id)
+            return
+
+        after, after_event_id = st.session_state.cached_last_event
+        events = st.session_state.adk_client.get_session_events(session_id, after, after_event_id)
+        if events is None:
+            self._fetch_conversation(session_id)
+            return
+
+        # the builder completes the last turn and appends new ones in place
+        st.session_state.cached_turn_builder.add(events)
+        st.session_state.cached_last_event = self._last_event(events, st.session_state.cached_last_event)
+        self.logger.debug("Appended %d new events to the cached conversation", len(events))
+
     def _render_conversation(self):
         """Render the current conversation with caching"""
         session_id = st.session_state.current_session_id
@@ -202,17 +258,16 @@ class ChatComponent(BaseComponent):
         # get conversation if session changed or cache is empty
         if (st.session_state.cached_session_id != session_id or 
             st.session_state.cached_conversation is None):
-            
-            self.logger.info(f"Fetching conversation for session: {session_id}")
-            selected_session = st.session_state.adk_client.get_session_by_id(session_id)
-            conversations = get_conversations(selected_session)
-            
-            st.session_state.cached_conversation = conversations
-            st.session_state.cached_session_id = session_id
-            self.logger.debug(f"Cached {len(conversations) if conversations else 0} conversation turns")
+            self._fetch_conversation(session_id)
+            st.session_state.conversation_stale = False
+        elif st.session_state.conversation_stale:
+            self._sync_conversation(session_id)
+            st.session_state.conversation_stale = False
         else:
-            self.logger.debug(f"Using cached conversation for session: {session_id}")
-            conversations = st.session_state.cached_conversation
+            self.logger.debug("Using cached conversation for session: %s", session_id)
+
+        conversations = st.session_state.cached_conversation
+        self.logger.debug("Cached %d conversation turns", len(conversations) if conversations else 0)
 
         if conversations:
             st.subheader("Current Conversation")
@@ -226,8 +281,10 @@ class ChatComponent(BaseComponent):
                 if "model" in turn:
                     with st.chat_message("assistant"):
                         st.write(turn["model"])
+                        if turn["tool_calls"]:
+                            st.caption("Tools used: " + ", ".join(call["name"] for call in turn["tool_calls"]))
             
-            self.logger.debug(f"Rendered {turn_count} conversation turns")
+            self.logger.debug("Rendered %d conversation turns", turn_count)
         else:
             st.info("There is no conversation within this session")
             self.logger.debug("No conversation found in current session")
@@ -241,7 +298,10 @@ class ChatComponent(BaseComponent):
 
     def _handle_user_message(self, message: str):
         """Handle user message and get response"""
-    
+
+        # sent to the backend as X-Request-ID, so both logs of this message can be matched
+        correlation_id.set(uuid.uuid4().hex[:16])
+
         if not st.session_state.current_session_id:
             try:
                 self.logger.info("No active session, creating new session for message")
@@ -260,34 +320,58 @@ class ChatComponent(BaseComponent):
         with st.chat_message("user"):
             st.write(message)
 
-        # agent response
+        # agent response, rendered while the events stream in
         with st.chat_message("assistant"):
-            with st.spinner("Thinking..."):
-                try:
-                    self.logger.info(f"Sending message to session {session_id}")
-                    
-                    response = st.session_state.adk_client.send_message(
-                        session_id,
-                        message
-                    )
-                    
-                    st.session_state.cached_conversation = None
-                    self.logger.debug("Invalidated conversation cache")
-                    
-                    # show response 
-                    if response:
-                        print(response)
-                        response_preview = str(response)[:100] + "..." if len(str(response)) > 100 else str(response)
-                        self.logger.debug(f"Response preview: {response_preview}")
-                        if "text" in response[0]["content"]["parts"][0]:
-                            st.write(response[0]["content"]["parts"][0]["text"])
-                    
+            try:
+                self.logger.info(f"Streaming message to session {session_id}")
+                completed = self._render_stream(st.session_state.adk_client.stream_message(session_id, message))
+
+                st.session_state.conversation_stale = True
+                self.logger.debug("Marked conversation cache for incremental refresh")
+
+                if completed:
                     self.logger.info("Triggering rerun to refresh conversation")
                     st.rerun()
-                    
-                except Exception as e:
-                    self.logger.error(f"Error processing message: {e}", exc_info=True)
-                    st.error(f"Error processing query: {e}")
+
+            except Exception as e:
+                self.logger.error(f"Error processing message: {e}", exc_info=True)
+                st.error(f"Error processing query: {e}")
+
+    def _render_stream(self, events) -> bool:
+        """Show partial text and tool-call progress as the agent events arrive.
+        Returns False if the run failed."""
+
+        status = st.status("Thinking...", expanded=False)
+        placeholder = st.empty()
+        shown_text = ""
+        partial_text = ""
+
+        for event in events:
+            if "error" in event:
+                status.update(label="Error", state="error")
+                st.error(f"Error processing query: {event['error']}")
+                self.logger.error(f"Agent run failed: {event['error']}")
+                return False
+
+            for part in (event.get("content") or {}).get("parts") or []:
+                if "functionCall" in part:
+                    name = part["functionCall"].get("name")
+                    status.update(label=f"Working: {name}...")
+                    status.write(f"Calling `{name}`")
+                elif "functionResponse" in part:
+                    status.write(f"`{part['functionResponse'].get('name')}` finished")
+                elif part.get("text"):
+                    if event.get("partial"):
+                        partial_text += part["text"]
+                    else:
+                        # the final event of a message carries its whole text
+                        shown_text += ("\n\n" if shown_text else "") + part["text"]
+                        partial_text = ""
+                    placeholder.markdown(shown_text + partial_text)
+
+        status.update(label="Done", state="complete")
+        self.logger.debug("Streamed response of %d characters", len(shown_text))
+        return True
 
 
 class TermsModal(BaseComponent):
@@ -324,4 +408,4 @@ class TermsModal(BaseComponent):
             self.logger.debug("Rendering terms and conditions modal")
             self._modal()
         else:
-            self.logger.debug(f"Terms already accepted: {st.session_state.accepted_terms}")
\ No newline at end of file
+            self.logger.debug("Terms already accepted: %s", st.session_state.accepted_terms)
\ No newline at end of file
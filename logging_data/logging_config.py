@@ -1,10 +1,59 @@
+import atexit
+import os
+import contextvars
+import json
 import logging
 import logging.config
+import logging.handlers
+import queue
+import random
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timezone
 
 from settings import settings
 
+# id of the request (or chat message) being handled, attached to every record
+correlation_id = contextvars.ContextVar("correlation_id", default="-")
+
+_listener = None
+
+
+class CorrelationIdFilter(logging.Filter):
+    """Stamp records with the correlation id of the current context"""
+
+    def filter(self, record):
+        # records coming through the queue were stamped on the thread that logged them
+        if not hasattr(record, "correlation_id"):
+            record.correlation_id = correlation_id.get()
+        return True
+
+
+class DebugSamplingFilter(logging.Filter):
+    """Let through only a fraction of the DEBUG records"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return record.levelno > logging.DEBUG or random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line"""
+
+    def format(self, record):
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "correlation_id": getattr(record, "correlation_id", "-"),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
 
 def get_logging_config(app_type="frontend"):
     """
@@ -22,60 +71,135 @@ def get_logging_config(app_type="frontend"):
     
     date_str = datetime.now().strftime("%Y%m%d")
     log_filename = log_dir / f"{app_type}_{date_str}.log"
+    if app_type == "backend" and settings.SERVER_WORKERS > 1:
+        # one file per worker process, so rotations do not race
+        log_filename = log_dir / f"{app_type}_{date_str}_{os.getpid()}.log"
     
     LOGGING = {
         "version": 1,
         "disable_existing_loggers": False,
         "formatters": {
             "main_formatter": {
-                "format": "{asctime} - {levelname} - {name} - {message}",
+                "format": "{asctime} - {levelname} - {name} - [{correlation_id}] - {message}",
                 "style": "{",
             },
             "console_formatter": {
                 "format": "{levelname} - {name} - {message}",
                 "style": "{",
-            }
+            },
+            "json_formatter": {
+                "()": JsonFormatter,
+            },
+        },
+        "filters": {
+            "correlation_id": {
+                "()": CorrelationIdFilter,
+            },
         },
         "handlers": {
             "file": {
                 "class": "logging.handlers.RotatingFileHandler",
                 "filename": str(log_filename),
-                "formatter": "main_formatter",
+                "formatter": "json_formatter" if settings.LOG_FORMAT == "json" else "main_formatter",
                 "maxBytes": 10485760,  # 10MB
                 "backupCount": 5,
-                "encoding": "utf-8"
+                "encoding": "utf-8",
+                "filters": ["correlation_id"],
             },
             "console": {
                 "class": "logging.StreamHandler",
-                "formatter": "console_formatter"
+                "formatter": "json_formatter" if settings.LOG_FORMAT == "json" else "console_formatter",
+                "filters": ["correlation_id"],
             }
         },
         "loggers": {
             "frontend": {
                 "handlers": ["file", "console"],
-                "level": "INFO",
+                "level": settings.LOG_LEVEL,
                 "propagate": False,
             },
             "backend": {
                 "handlers": ["file", "console"],
-                "level": "INFO",
+                "level": settings.LOG_LEVEL,
                 "propagate": False,
             },
         },
         "root": {
             "handlers": ["file", "console"],
-            "level": "INFO",
+            "level": settings.LOG_LEVEL,
         }
     }
     
     return LOGGING
 
 
+def _start_queue_listener(handlers):
+    """Serve the given handlers from a background thread through a queue.
+
+    Loggers only put records on the queue, the file and console I/O happens
+    in the listener thread.
+    """
+    global _listener
+
+    records = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(records)
+    # runs on the thread that logs, so the correlation id of its context is kept
+    queue_handler.addFilter(CorrelationIdFilter())
+    _listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+    _listener.start()
+    return queue_handler
+
+
+def _stop_queue_listener():
+    global _listener
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(_stop_queue_listener)
+
+
+def active_log_files() -> set:
+    """Absolute paths of the log files this process is writing to.
+
+    With the queue listener the loggers only hold a QueueHandler, so the
+    file handlers are looked up on the listener as well.
+    """
+    handlers = [
+        handler
+        for logger in (logging.getLogger(), logging.getLogger("backend"), logging.getLogger("frontend"))
+        for handler in logger.handlers
+    ]
+    if _listener is not None:
+        handlers += _listener.handlers
+    return {os.path.abspath(handler.baseFilename) for handler in handlers if getattr(handler, "baseFilename", None)}
+
+
+def _configure(app_type: str) -> dict:
+    config = get_logging_config(app_type)
+    # flush records still queued for the handlers dictConfig is about to close
+    _stop_queue_listener()
+    logging.config.dictConfig(config)
+
+    loggers = [logging.getLogger(), logging.getLogger("frontend"), logging.getLogger("backend")]
+    handlers = list(dict.fromkeys(handler for logger in loggers for handler in logger.handlers))
+    if settings.LOG_QUEUE:
+        queue_handler = _start_queue_listener(handlers)
+        for logger in loggers:
+            logger.handlers = [queue_handler]
+        handlers = [queue_handler]
+    if settings.LOG_DEBUG_SAMPLE_RATE < 1:
+        for handler in handlers:
+            handler.addFilter(DebugSamplingFilter(settings.LOG_DEBUG_SAMPLE_RATE))
+    return config
+
+
 def setup_frontend_logging():
     """Setup logging configuration for frontend services"""
 
-    config = get_logging_config("frontend")
-    logging.config.dictConfig(config)
+    config = _configure("frontend")
     
     logger = logging.getLogger("frontend")
     logger.info("=" * 80)
@@ -89,8 +213,7 @@ def setup_frontend_logging():
 def setup_backend_logging():
     """Setup logging configuration for backend services"""
 
-    config = get_logging_config("backend")
-    logging.config.dictConfig(config)
+    config = _configure("backend")
     
     logger = logging.getLogger("backend")
     logger.info("=" * 80)
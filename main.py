@@ -1,10 +1,30 @@
+import asyncio
 import os
-from google.adk.cli.fast_api import get_fast_api_app
+from contextlib import asynccontextmanager
+from google.adk.artifacts import InMemoryArtifactService
+from google.adk.auth.credential_service.in_memory_credential_service import InMemoryCredentialService
+from google.adk.cli import fast_api
+from google.adk.cli.adk_web_server import AdkWebServer
+from google.adk.cli.utils.agent_loader import AgentLoader
+from google.adk.evaluation.local_eval_set_results_manager import LocalEvalSetResultsManager
+from google.adk.evaluation.local_eval_sets_manager import LocalEvalSetsManager
+from google.adk.memory import InMemoryMemoryService
 from fastapi import FastAPI
+from google.adk.sessions import DatabaseSessionService
 from settings import settings
 from pathlib import Path
 
 from logging_data.logging_config import setup_backend_logging, get_backend_logger
+from backend.services.janitor import Janitor, claim_janitor_role
+from backend.services.metrics import registry
+from backend.services.middleware import register_middleware
+from backend.services.routes import register_routes
+from backend.services.tracing import setup_tracing
+from backend.teacher_agent.context_cache import context_cache
+from backend.teacher_agent.response_cache import response_cache
+from backend.tools.session_db import session_databases
+from backend.tools.sql_executor import sql_executor
+from backend.services.session_store import create_session_indexes, session_db_kwargs, session_db_url, tune_sqlite_engine
 
 setup_backend_logging()
 
@@ -12,22 +32,87 @@ logger = get_backend_logger(__name__)
 
 logger.info("Starting Teacher Agent API... Version %s", settings.APP_VERSION)
 AGENT_DIR = str(Path(__file__).resolve().parent / "backend")
-SESSION_DB_URL = f"sqlite:///{settings.SESSION_DB}"
+SESSION_DB_URL = session_db_url()
+SESSION_DB_KWARGS = session_db_kwargs(SESSION_DB_URL)
 
-# Create FastAPI app with enabled cloud tracing
-app: FastAPI = get_fast_api_app(
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run the storage janitor and the snapshot flush in the background while the app is up"""
+    # with several workers only one of them cleans up
+    run_janitor = settings.JANITOR_ENABLED and claim_janitor_role()
+    task = asyncio.create_task(janitor.run_forever()) if run_janitor else None
+    flush = asyncio.create_task(session_databases.flush_forever())
+    yield
+    if task is not None:
+        task.cancel()
+    flush.cancel()
+    await asyncio.to_thread(session_databases.flush_snapshots)
+
+
+# one session service (and connection pool) for the agents, the custom routes and the janitor
+session_service = DatabaseSessionService(db_url=SESSION_DB_URL, **SESSION_DB_KWARGS)
+tune_sqlite_engine(session_service.db_engine)
+create_session_indexes(session_service.db_engine)
+
+# get_fast_api_app would build a second session service from the URL, so
+# the ADK web server is assembled here the same way, around the shared one
+adk_web_server = AdkWebServer(
+    agent_loader=AgentLoader(AGENT_DIR),
+    session_service=session_service,
+    artifact_service=InMemoryArtifactService(),
+    memory_service=InMemoryMemoryService(),
+    credential_service=InMemoryCredentialService(),
+    eval_sets_manager=LocalEvalSetsManager(agents_dir=AGENT_DIR),
+    eval_set_results_manager=LocalEvalSetResultsManager(agents_dir=AGENT_DIR),
     agents_dir=AGENT_DIR,
-    session_service_uri=SESSION_DB_URL,
+)
+
+# Create FastAPI app (it installs the OpenTelemetry tracer provider used by setup_tracing)
+app: FastAPI = adk_web_server.get_fast_api_app(
+    lifespan=lifespan,
     allow_origins=["*"],
-    artifact_service_uri=None,
-    web=True,
+    web_assets_dir=str(Path(fast_api.__file__).parent / "browser"),
 )
 
 app.title = "teacher-agent v.1.0"
 app.description = "API for interacting with the Agent teacher-agent"
 
+register_routes(app, session_service)
+register_middleware(app)
+setup_tracing()
+janitor = Janitor(session_service.db_engine, session_databases)
+
+registry.stats_metrics(
+    "session_databases", "Live per-session SQL databases", session_databases.stats,
+    gauges=("active_sessions", "max_sessions", "file_storage"),
+)
+registry.stats_metrics(
+    "sql_executor", "Queue depth and throughput of the SQL worker pool", sql_executor.stats,
+    counters=("completed", "rejected"), gauges=("workers", "queued", "running", "max_queue_depth"),
+)
+registry.stats_metrics(
+    "response_cache", "Lookups and entries of the response cache", response_cache.stats,
+    counters=("exact_hits", "semantic_hits", "misses", "stores", "evictions"), gauges=("entries",),
+)
+registry.stats_metrics(
+    "context_cache", "Lookups and created caches of the context cache", context_cache.stats,
+    counters=("hits", "misses", "too_small", "created", "failures"), gauges=("entries",),
+)
+registry.stats_metrics(
+    "janitor", "Rows, files and bytes removed by the janitor", janitor.stats,
+    counters=("runs", "sessions_deleted", "events_deleted", "snapshots_deleted", "log_files_deleted", "vacuums",
+              "bytes_reclaimed"),
+)
+# each worker imports this module; the process that only starts them (run as __main__) serves nothing
+if settings.SERVER_WORKERS > 1 and __name__ != "__main__":
+    registry.share_across_workers(settings.METRICS_DIR, settings.METRICS_SHARE_INTERVAL)
 
 if __name__ == "__main__":
     import uvicorn
 
-    uvicorn.run(app, host="0.0.0.0", port=8080)
+    if settings.SERVER_WORKERS > 1:
+        # every worker imports the app itself, so it is passed by name
+        uvicorn.run("main:app", host="0.0.0.0", port=8080, workers=settings.SERVER_WORKERS)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8080)
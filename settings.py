@@ -12,9 +12,97 @@ class Settings:
     APP_VERSION = "2.0"
     USER_ID = "user"
     BASE_URL = os.getenv("BASE_URL", "http://localhost:8082")
+    SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", "1"))  # backend processes
+
+    # frontend HTTP client
+    HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "30"))  # seconds
+    HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+    HTTP_RUN_TIMEOUT = float(os.getenv("HTTP_RUN_TIMEOUT", "300"))  # a whole agent run
+    HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "2"))
+    HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+    HTTP_MAX_CONCURRENCY = int(os.getenv("HTTP_MAX_CONCURRENCY", "8"))  # parallel session fetches
+    HTTP2 = os.getenv("HTTP2", "false").lower() == "true"  # needs the h2 package
     BASE_DIR = Path(__file__).parent
     LOG_DIR = BASE_DIR / "logs"
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()  # "text" or "json"
+    LOG_QUEUE = os.getenv("LOG_QUEUE", "true").lower() == "true"  # write logs from a background thread
+    LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "1.0"))  # share of DEBUG records kept
+    # "none", "console" or "otlp" (a collector at OTEL_EXPORTER_OTLP_ENDPOINT)
+    TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "none").lower()
+    TRACING_MAX_STATEMENT_CHARS = int(os.getenv("TRACING_MAX_STATEMENT_CHARS", "1000"))
+    # with several workers each one publishes its metrics here, so any of them can answer /metrics
+    METRICS_DIR = Path(os.getenv("METRICS_DIR", LOG_DIR / "metrics"))
+    METRICS_SHARE_INTERVAL = float(os.getenv("METRICS_SHARE_INTERVAL", "5"))  # seconds
     SESSION_DB = os.getenv("SESSION_DB", os.path.join(BASE_DIR, "session.db"))
+    # any SQLAlchemy URL (e.g. a local Postgres); overrides SESSION_DB when set
+    SESSION_DB_URL = os.getenv("SESSION_DB_URL", "")
+    SESSION_DB_POOL_SIZE = int(os.getenv("SESSION_DB_POOL_SIZE", "10"))
+    SESSION_DB_MAX_OVERFLOW = int(os.getenv("SESSION_DB_MAX_OVERFLOW", "20"))
+    SESSION_DB_POOL_TIMEOUT = float(os.getenv("SESSION_DB_POOL_TIMEOUT", "30"))  # seconds
+    SESSION_DB_BUSY_TIMEOUT = float(os.getenv("SESSION_DB_BUSY_TIMEOUT", "15"))  # seconds, SQLite only
+    SESSION_DB_MMAP_MB = int(os.getenv("SESSION_DB_MMAP_MB", "256"))  # SQLite only
+
+    # background janitor (retention of 0 days keeps a resource forever)
+    JANITOR_ENABLED = os.getenv("JANITOR_ENABLED", "true").lower() == "true"
+    JANITOR_INTERVAL = int(os.getenv("JANITOR_INTERVAL", "3600"))  # seconds between runs
+    JANITOR_BATCH_SIZE = int(os.getenv("JANITOR_BATCH_SIZE", "50"))  # sessions deleted per transaction
+    JANITOR_BATCH_PAUSE = float(os.getenv("JANITOR_BATCH_PAUSE", "0.05"))  # seconds between batches
+    JANITOR_GRACE_PERIOD = int(os.getenv("JANITOR_GRACE_PERIOD", "3600"))  # seconds before orphans are removed
+    SESSION_RETENTION_DAYS = int(os.getenv("SESSION_RETENTION_DAYS", "90"))  # since the last message
+    LOG_RETENTION_DAYS = int(os.getenv("LOG_RETENTION_DAYS", "30"))
+    SQL_SNAPSHOT_RETENTION_DAYS = int(os.getenv("SQL_SNAPSHOT_RETENTION_DAYS", "0"))  # since the last change
+    SESSION_DB_VACUUM_INTERVAL = int(os.getenv("SESSION_DB_VACUUM_INTERVAL", "86400"))  # seconds, SQLite only
+    SESSION_DB_VACUUM_FREE_RATIO = float(os.getenv("SESSION_DB_VACUUM_FREE_RATIO", "0.2"))  # free pages needed
+
+    # per-session SQL databases used by db_interactions
+    SQL_MAX_SESSIONS = int(os.getenv("SQL_MAX_SESSIONS", "500"))
+    # changed session databases are snapshotted here ("" disables persistence)
+    SQL_SNAPSHOT_DIR = os.getenv("SQL_SNAPSHOT_DIR", os.path.join(BASE_DIR, "sql_snapshots"))
+    SQL_SNAPSHOT_INTERVAL = float(os.getenv("SQL_SNAPSHOT_INTERVAL", "5"))  # seconds between snapshot flushes
+    # "memory" (snapshotted) or "file" (databases live in SQL_SNAPSHOT_DIR, shared by all workers)
+    SQL_STORAGE = os.getenv("SQL_STORAGE", "file" if SERVER_WORKERS > 1 else "memory").lower()
+    SQL_SESSION_TTL = int(os.getenv("SQL_SESSION_TTL", "3600"))  # seconds idle
+    SQL_POOL_SIZE = int(os.getenv("SQL_POOL_SIZE", "2"))  # connections per session
+    SQL_POOL_TIMEOUT = float(os.getenv("SQL_POOL_TIMEOUT", "5"))  # seconds
+    SQL_WORKERS = int(os.getenv("SQL_WORKERS", "4"))
+    SQL_MAX_PENDING = int(os.getenv("SQL_MAX_PENDING", "64"))
+    SQL_TIMEOUT = float(os.getenv("SQL_TIMEOUT", "5"))  # seconds per statement
+    SQL_MAX_STEPS = int(os.getenv("SQL_MAX_STEPS", "100000000"))  # SQLite VM instructions
+    SQL_PROGRESS_INTERVAL = int(os.getenv("SQL_PROGRESS_INTERVAL", "10000"))
+    SQL_MAX_DB_MB = int(os.getenv("SQL_MAX_DB_MB", "64"))  # size cap per session database
+    SQL_MAX_VALUE_MB = int(os.getenv("SQL_MAX_VALUE_MB", "4"))  # longest string or blob
+    SQL_PAGE_SIZE = int(os.getenv("SQL_PAGE_SIZE", "50"))  # rows returned per call
+    SQL_COUNT_LIMIT = int(os.getenv("SQL_COUNT_LIMIT", "10000"))  # rows counted past a page
+    SQL_MAX_PAGE_TOKENS = int(os.getenv("SQL_MAX_PAGE_TOKENS", "32"))  # per session
+    SCHEMA_DIGEST_MAX_CHARS = int(os.getenv("SCHEMA_DIGEST_MAX_CHARS", "2000"))  # schema summary given to the agents
+    SQL_HISTORY_SIZE = int(os.getenv("SQL_HISTORY_SIZE", "50"))  # distinct queries remembered per session
+    SQL_SLOW_QUERY_MS = float(os.getenv("SQL_SLOW_QUERY_MS", "200"))  # slower queries get a performance hint
+    INDEX_ADVISOR_MAX_QUERIES = int(os.getenv("INDEX_ADVISOR_MAX_QUERIES", "5"))  # from the history, per advice
+    INDEX_ADVISOR_RUNS = int(os.getenv("INDEX_ADVISOR_RUNS", "3"))  # timed runs per query, best one kept
+    # answer messages made only of SQL without calling the model
+    SQL_FAST_PATH = os.getenv("SQL_FAST_PATH", "true").lower() == "true"
+
+    # cache of quiz_agent / schema_designer_agent answers shared by a cohort
+    RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+    RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "512"))
+    RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", "900"))  # seconds
+    RESPONSE_CACHE_SEMANTIC = os.getenv("RESPONSE_CACHE_SEMANTIC", "false").lower() == "true"
+    RESPONSE_CACHE_SIMILARITY = float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0.95"))
+    RESPONSE_CACHE_EMBEDDING_MODEL = os.getenv("RESPONSE_CACHE_EMBEDDING_MODEL", "text-embedding-004")
+
+    # summarize old turns of long conversations instead of replaying them to the root agent
+    COMPACTION_ENABLED = os.getenv("COMPACTION_ENABLED", "true").lower() == "true"
+    COMPACTION_KEEP_TURNS = int(os.getenv("COMPACTION_KEEP_TURNS", "6"))  # recent turns sent verbatim
+    COMPACTION_BATCH_TURNS = int(os.getenv("COMPACTION_BATCH_TURNS", "6"))  # turns folded per summary update
+    COMPACTION_MODEL = os.getenv("COMPACTION_MODEL", "gemini-2.0-flash")
+    COMPACTION_SUMMARY_CHARS = int(os.getenv("COMPACTION_SUMMARY_CHARS", "4000"))
+    COMPACTION_TOOL_CHARS = int(os.getenv("COMPACTION_TOOL_CHARS", "500"))  # per tool call shown to the summarizer
+
+    # serve the static instruction and tool declarations of the agents from the model's context cache
+    CONTEXT_CACHE_ENABLED = os.getenv("CONTEXT_CACHE_ENABLED", "false").lower() == "true"
+    CONTEXT_CACHE_TTL = int(os.getenv("CONTEXT_CACHE_TTL", "3600"))  # seconds
+    CONTEXT_CACHE_MIN_TOKENS = int(os.getenv("CONTEXT_CACHE_MIN_TOKENS", "4096"))  # smaller prefixes are not cacheable
 
     @staticmethod
     def get_session_id():
@@ -0,0 +1,20 @@
+"""Shared fixtures: session databases stay in memory and are dropped after each test"""
+
+import os
+import uuid
+
+# read by settings at import time: no snapshots, no janitor, no exporters
+os.environ["SQL_SNAPSHOT_DIR"] = ""
+os.environ["SQL_STORAGE"] = "memory"
+os.environ["JANITOR_ENABLED"] = "false"
+
+import pytest  # noqa: E402
+
+from backend.tools.session_db import session_databases  # noqa: E402
+
+
+@pytest.fixture
+def session_id():
+    session_id = f"test-{uuid.uuid4().hex}"
+    yield session_id
+    session_databases.drop(session_id)
@@ -0,0 +1,55 @@
+from backend.tools.db_connector import execute_script, execute_sql, fetch_page
+from settings import settings
+
+
+def test_failed_script_is_rolled_back(session_id):
+    result = execute_script(
+        session_id,
+        "CREATE TABLE students (id INTEGER PRIMARY KEY, name TEXT NOT NULL);"
+        "INSERT INTO students (name) VALUES ('Ana');"
+        "INSERT INTO students (name) VALUES (NULL);",
+    )
+
+    assert result["response"] == "error"
+    assert result["rolled_back"] is True
+    assert result["failed_statement"] == 3
+    assert [step["response"] for step in result["results"]] == ["ok", "ok"]
+    assert "no such table" in execute_sql(session_id, "SELECT * FROM students")["details"]
+
+
+def test_script_failing_at_commit_is_rolled_back(session_id):
+    # deferred foreign keys are only checked when the transaction commits
+    execute_sql(session_id, "PRAGMA foreign_keys = ON")
+    execute_script(
+        session_id,
+        "CREATE TABLE courses (id INTEGER PRIMARY KEY);"
+        "CREATE TABLE enrollments (course_id INTEGER REFERENCES courses (id) DEFERRABLE INITIALLY DEFERRED);",
+    )
+
+    result = execute_script(session_id, "INSERT INTO enrollments VALUES (42); INSERT INTO enrollments VALUES (43);")
+
+    assert result["response"] == "error"
+    assert result["rolled_back"] is True
+    assert "failed_statement" not in result
+    assert execute_sql(session_id, "SELECT count(*) FROM enrollments")["rows"] == [(0,)]
+    assert execute_sql(session_id, "INSERT INTO courses VALUES (1)")["response"] == "successfully executed command"
+
+
+def test_page_token_returns_the_next_page(session_id, monkeypatch):
+    monkeypatch.setattr(settings, "SQL_PAGE_SIZE", 2)
+    execute_sql(session_id, "CREATE TABLE t (a INTEGER)")
+    execute_sql(session_id, "INSERT INTO t VALUES (1), (2), (3), (4), (5)")
+
+    first = execute_sql(session_id, "SELECT a FROM t ORDER BY a")
+    assert first["rows"] == [(1,), (2,)]
+    assert first["total_rows_estimate"] == 5
+    second = fetch_page(session_id, first["page_token"])
+    assert second["rows"] == [(3,), (4,)]
+    assert second["offset"] == 2
+    last = fetch_page(session_id, second["page_token"])
+    assert last["rows"] == [(5,)]
+    assert "page_token" not in last
+
+    # tokens are single use
+    assert fetch_page(session_id, first["page_token"])["response"] == "error"
+    assert fetch_page(session_id, "unknown")["response"] == "error"
@@ -0,0 +1,28 @@
+import asyncio
+from types import SimpleNamespace
+
+from google.genai import types
+
+from backend.teacher_agent.callbacks import QUIZ_RESPONSE_KEY, mark_quiz_pending
+from backend.teacher_agent.fast_path import AWAITING_QUIZ_ANSWER_KEY, sql_fast_path
+from backend.tools.session_db import SQL_SESSION_KEY
+
+
+def _after_quiz_reply(reply):
+    state = {QUIZ_RESPONSE_KEY: reply}
+    mark_quiz_pending(SimpleNamespace(state=state))
+    return state.get(AWAITING_QUIZ_ANSWER_KEY, False)
+
+
+def test_only_a_round_of_questions_waits_for_an_answer():
+    assert _after_quiz_reply("## Quiz\n1. What does `SELECT COUNT(*) FROM students;` return?")
+    assert not _after_quiz_reply("Correct! COUNT(*) counts every row. You could review GROUP BY next.")
+    assert not _after_quiz_reply("Sure, what topic would you like the next quiz on?")
+
+
+def test_answer_to_a_quiz_skips_the_fast_path_once(session_id):
+    state = {SQL_SESSION_KEY: session_id, AWAITING_QUIZ_ANSWER_KEY: True}
+    context = SimpleNamespace(state=state, user_content=types.Content(role="user", parts=[types.Part(text="SELECT 1;")]))
+
+    assert asyncio.run(sql_fast_path(context)) is None
+    assert asyncio.run(sql_fast_path(context)) is not None
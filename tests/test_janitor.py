@@ -0,0 +1,54 @@
+import logging
+import os
+import time
+
+from backend.services.janitor import Janitor
+from backend.tools.session_db import SessionDatabaseManager
+from logging_data import logging_config
+from settings import settings
+
+OLD = time.time() - 400 * 86400
+
+
+def _age(*paths):
+    for path in paths:
+        os.utime(path, (OLD, OLD))
+
+
+def test_open_session_databases_are_not_purged(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "SQL_SNAPSHOT_RETENTION_DAYS", 1)
+    manager = SessionDatabaseManager(max_sessions=10, idle_ttl=3600, pool_size=1, pool_timeout=1,
+                                     snapshot_dir=str(tmp_path), storage="file")
+    manager.get("live-session")
+    (tmp_path / "gone-session.db").write_bytes(b"")
+    _age(*tmp_path.glob("*.db*"))
+
+    janitor = Janitor(engine=None, session_databases=manager)
+    monkeypatch.setattr(janitor, "_known_session_ids", lambda: {"live-session"})
+    janitor.purge_snapshots()
+
+    assert (tmp_path / "live-session.db").exists()
+    assert not (tmp_path / "gone-session.db").exists()
+    manager.drop("live-session")
+
+
+def test_log_files_written_through_the_queue_are_not_purged(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "LOG_DIR", tmp_path)
+    monkeypatch.setattr(settings, "LOG_RETENTION_DAYS", 1)
+    active, stale = tmp_path / "active.log", tmp_path / "stale.log"
+    handler = logging.FileHandler(active)
+    stale.write_text("old\n")
+    _age(active, stale)
+
+    previous = logging_config._listener
+    queue_handler = logging_config._start_queue_listener([handler])
+    try:
+        Janitor(engine=None, session_databases=None).purge_logs()
+    finally:
+        logging_config._listener.stop()
+        logging_config._listener = previous
+        queue_handler.close()
+        handler.close()
+
+    assert active.exists()
+    assert not stale.exists()
@@ -0,0 +1,36 @@
+import json
+import os
+
+from backend.services.metrics import MetricsRegistry
+
+
+def _stats():
+    return {"completed": 7, "rejected": 1, "queued": 2, "hit_rate": 0.5}
+
+
+def test_stats_are_exported_as_counters_and_gauges():
+    registry = MetricsRegistry()
+    registry.stats_metrics("pool", "SQL pool", _stats, counters=("completed", "rejected"), gauges=("queued",))
+
+    text = registry.render()
+
+    assert "# TYPE sql_teacher_pool_completed_total counter\nsql_teacher_pool_completed_total 7\n" in text
+    assert "# TYPE sql_teacher_pool_queued gauge\nsql_teacher_pool_queued 2\n" in text
+    assert "hit_rate" not in text
+
+
+def test_scrape_reports_every_worker(tmp_path):
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Requests", ("route",))
+    requests.inc(route="/run")
+    registry.share_across_workers(tmp_path, interval=60)
+    other_worker = {"sql_teacher_requests_total": {
+        "help": "Requests", "type": "counter", "samples": ['sql_teacher_requests_total{route="/run",worker="1"} 3'],
+    }}
+    (tmp_path / "1.json").write_text(json.dumps(other_worker))
+
+    text = registry.render()
+
+    assert text.count("# TYPE sql_teacher_requests_total counter") == 1
+    assert 'sql_teacher_requests_total{route="/run",worker="1"} 3' in text
+    assert f'sql_teacher_requests_total{{route="/run",worker="{os.getpid()}"}} 1' in text
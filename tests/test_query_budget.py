@@ -0,0 +1,34 @@
+from backend.tools.db_connector import execute_script, execute_sql
+from settings import settings
+
+ENDLESS_QUERY = "WITH RECURSIVE r(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM r) SELECT count(*) FROM r"
+
+
+def test_statement_is_interrupted_after_the_time_limit(session_id, monkeypatch):
+    monkeypatch.setattr(settings, "SQL_TIMEOUT", 0.2)
+    result = execute_sql(session_id, ENDLESS_QUERY)
+    assert result == {"response": "error", "details": "query exceeded the time limit of 0.2 seconds"}
+
+
+def test_statement_is_interrupted_after_the_step_budget(session_id, monkeypatch):
+    monkeypatch.setattr(settings, "SQL_MAX_STEPS", 100000)
+    result = execute_sql(session_id, ENDLESS_QUERY)
+    assert result == {"response": "error", "details": "query exceeded the budget of 100000 SQLite VM steps"}
+
+
+def test_connection_is_usable_after_an_interrupted_statement(session_id, monkeypatch):
+    monkeypatch.setattr(settings, "SQL_TIMEOUT", 0.2)
+    execute_sql(session_id, ENDLESS_QUERY)
+    assert execute_sql(session_id, "SELECT 1")["rows"] == [(1,)]
+
+
+def test_script_shares_one_budget_across_its_statements(session_id, monkeypatch):
+    # each count takes about 170,000 steps: one fits in the budget, five do not
+    monkeypatch.setattr(settings, "SQL_MAX_STEPS", 500000)
+    count = "WITH RECURSIVE r(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM r WHERE i < 10000) SELECT count(*) FROM r;"
+
+    assert execute_script(session_id, count)["response"] != "error"
+    result = execute_script(session_id, count * 5)
+    assert result["response"] == "error"
+    assert result["details"] == "query exceeded the budget of 500000 SQLite VM steps"
+    assert result["rolled_back"] is True
@@ -0,0 +1,52 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from google.genai import types
+
+from backend.teacher_agent.callbacks import plan_before_narrating
+from backend.tools.query_plan import classify_step, find_sql
+from backend.tools.session_db import SQL_SESSION_KEY
+
+
+@pytest.mark.parametrize("text", [
+    "How do I speed up queries with indexes?",
+    "Explain what happens when I select rows with a filter",
+    "Can you update me on what a join does?",
+    "",
+])
+def test_find_sql_ignores_prose(text):
+    assert find_sql(text) is None
+
+
+@pytest.mark.parametrize("text, sql", [
+    ("Explain the plan of SELECT name FROM students WHERE age > 20",
+     "SELECT name FROM students WHERE age > 20"),
+    ("why is select * from students; slow?", "select * from students;"),
+    ("Look at this:\n```sql\nselect name from students\n```", "select name from students"),
+])
+def test_find_sql_finds_the_query(text, sql):
+    assert find_sql(text) == sql
+
+
+def test_classify_step():
+    assert classify_step("SCAN students")["operation"] == "full_scan"
+    seek = classify_step("SEARCH students USING INDEX ix_age (age>?)")
+    assert (seek["operation"], seek["index"], seek["constraint"]) == ("index_seek", "ix_age", "age>?")
+    assert classify_step("USE TEMP B-TREE FOR ORDER BY")["purpose"] == "ORDER BY"
+
+
+def _plan_call(session_id, text):
+    context = SimpleNamespace(state={SQL_SESSION_KEY: session_id})
+    request = SimpleNamespace(contents=[types.Content(role="user", parts=[types.Part(text=text)])])
+    response = asyncio.run(plan_before_narrating(context, request))
+    return response.content.parts[0].function_call if response else None
+
+
+def test_prose_that_does_not_compile_goes_to_the_model(session_id):
+    assert _plan_call(session_id, "Explain what happens when I SELECT rows with a filter") is None
+
+
+def test_query_is_explained_without_asking_the_model(session_id):
+    call = _plan_call(session_id, "Explain the plan of SELECT name FROM students WHERE age > 20")
+    assert (call.name, call.args) == ("explain_query_plan", {"sql_query": "SELECT name FROM students WHERE age > 20"})
@@ -0,0 +1,46 @@
+import asyncio
+from types import SimpleNamespace
+
+from google.adk.models import LlmRequest, LlmResponse
+from google.genai import types
+
+from backend.teacher_agent.response_cache import ResponseCache
+from backend.tools.schema_digest import SCHEMA_DIGEST_KEY
+
+
+def _context(invocation_id, digest):
+    return SimpleNamespace(agent_name="quiz_agent", invocation_id=invocation_id, state={SCHEMA_DIGEST_KEY: digest})
+
+
+def _request():
+    return LlmRequest(contents=[types.Content(role="user", parts=[types.Part(text="Give me a practical quiz")])])
+
+
+def _answer(text):
+    return LlmResponse(content=types.Content(role="model", parts=[types.Part(text=text)]))
+
+
+def _ask(cache, invocation_id, digest):
+    """Look the request up and store a fresh answer on a miss, return the cached answer or None"""
+    context = _context(invocation_id, digest)
+    hit = asyncio.run(cache.before_model(context, _request()))
+    if hit is None:
+        cache.after_model(context, _answer(f"quiz about {digest}"))
+        return None
+    return hit.content.parts[0].text
+
+
+def test_sessions_with_different_schemas_do_not_share_answers():
+    cache = ResponseCache(max_entries=16, ttl=60)
+
+    assert _ask(cache, "a1", "students(id, name)") is None
+    assert _ask(cache, "b1", "orders(id, total)") is None
+    assert _ask(cache, "a2", "students(id, name)") == "quiz about students(id, name)"
+    assert _ask(cache, "b2", "orders(id, total)") == "quiz about orders(id, total)"
+
+
+def test_sessions_without_tables_share_answers():
+    cache = ResponseCache(max_entries=16, ttl=60)
+
+    assert _ask(cache, "a1", "") is None
+    assert _ask(cache, "b1", None) == "quiz about "
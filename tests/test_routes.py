@@ -0,0 +1,45 @@
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from google.adk.events import Event
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from backend.services.routes import register_routes
+
+
+def _client_with_session(timestamps):
+    service = InMemorySessionService()
+
+    async def populate():
+        session = await service.create_session(app_name="app", user_id="user")
+        for index, timestamp in enumerate(timestamps):
+            event = Event(id=f"e{index}", author="user", timestamp=timestamp,
+                          content=types.Content(role="user", parts=[types.Part(text=f"message {index}")]))
+            await service.append_event(session, event)
+        return session.id
+
+    session_id = asyncio.run(populate())
+    app = FastAPI()
+    register_routes(app, service)
+    return TestClient(app), f"/apps/app/users/user/sessions/{session_id}/events"
+
+
+def test_events_route_returns_only_newer_events():
+    client, url = _client_with_session([100.0, 200.0, 200.0, 300.0])
+
+    everything = client.get(url).json()
+    assert [event["id"] for event in everything["events"]] == ["e0", "e1", "e2", "e3"]
+    assert everything["lastUpdateTime"] == 300.0
+
+    # e2 shares the timestamp of the last event the client has seen
+    newer = client.get(url, params={"after": 200.0, "after_event_id": "e1"}).json()
+    assert [event["id"] for event in newer["events"]] == ["e2", "e3"]
+
+    assert client.get(url, params={"after": 300.0, "after_event_id": "e3"}).json()["events"] == []
+
+
+def test_events_route_of_unknown_session_is_not_found():
+    client, _ = _client_with_session([])
+    assert client.get("/apps/app/users/user/sessions/missing/events").status_code == 404
@@ -0,0 +1,91 @@
+import sqlite3
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.tools.db_connector import execute_script, execute_sql
+from backend.tools.session_db import SessionDatabaseManager, session_databases
+from settings import settings
+
+
+def test_sessions_do_not_share_tables(session_id):
+    other = f"test-{uuid.uuid4().hex}"
+    try:
+        for sid, value in ((session_id, 1), (other, 2)):
+            assert execute_sql(sid, "CREATE TABLE t (a INTEGER)")["response"] == "successfully executed command"
+            execute_sql(sid, f"INSERT INTO t VALUES ({value})")
+
+        assert execute_sql(session_id, "SELECT a FROM t")["rows"] == [(1,)]
+        assert execute_sql(other, "SELECT a FROM t")["rows"] == [(2,)]
+    finally:
+        session_databases.drop(other)
+
+
+def test_concurrent_writes_to_one_session_are_serialized(session_id):
+    execute_sql(session_id, "CREATE TABLE t (a INTEGER)")
+
+    def write(i):
+        if i % 2:
+            return execute_sql(session_id, f"INSERT INTO t VALUES ({i})")
+        return execute_script(session_id, f"INSERT INTO t VALUES ({i}); INSERT INTO t VALUES ({i});")
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(write, range(16)))
+
+    assert [result["response"] for result in results if result["response"] == "error"] == []
+    assert execute_sql(session_id, "SELECT count(*) FROM t")["rows"] == [(24,)]
+
+
+def test_readers_never_see_a_script_that_rolls_back(session_id):
+    execute_sql(session_id, "CREATE TABLE t (a INTEGER NOT NULL)")
+    script = (
+        "INSERT INTO t VALUES (1);"
+        "WITH RECURSIVE r(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM r WHERE i < 2000000) SELECT count(*) FROM r;"
+        "INSERT INTO t VALUES (NULL);"
+    )
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        running = pool.submit(execute_script, session_id, script)
+        # read while the script is inside its transaction
+        time.sleep(0.1)
+        read = execute_sql(session_id, "SELECT count(*) FROM t")
+        assert running.result()["rolled_back"] is True
+
+    assert read["rows"] == [(0,)]
+
+
+def test_attach_and_vacuum_into_are_denied(session_id, tmp_path):
+    escape = tmp_path / "escape.db"
+    for statement in ("ATTACH ':memory:' AS other", f"VACUUM INTO '{escape}'", "PRAGMA max_page_count = 1000000"):
+        assert execute_sql(session_id, statement)["response"] == "error"
+    assert not escape.exists()
+
+
+def test_temporary_tables_share_the_size_cap(session_id, monkeypatch):
+    monkeypatch.setattr(settings, "SQL_MAX_DB_MB", 1)
+    execute_sql(session_id, "CREATE TEMP TABLE big (payload BLOB)")
+    result = execute_sql(
+        session_id,
+        "WITH RECURSIVE r(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM r WHERE i < 5000) "
+        "INSERT INTO big SELECT randomblob(1000) FROM r",
+    )
+    assert result == {"response": "error", "details": "the session database is limited to 1 MB"}
+
+
+def test_writes_mark_the_snapshot_dirty_instead_of_copying(session_id, tmp_path, monkeypatch):
+    manager = SessionDatabaseManager(max_sessions=4, idle_ttl=60, pool_size=2, pool_timeout=1, snapshot_dir=tmp_path)
+    monkeypatch.setattr("backend.tools.db_connector.session_databases", manager)
+    snapshot = manager.snapshot_path(session_id)
+
+    execute_script(session_id, "CREATE TABLE t (a INTEGER); INSERT INTO t VALUES (1);")
+    execute_sql(session_id, "INSERT INTO t VALUES (2)")
+    assert not snapshot.exists()
+
+    manager.flush_snapshots()
+    assert sqlite3.connect(snapshot).execute("SELECT count(*) FROM t").fetchone() == (2,)
+    assert not manager.get(session_id).dirty
+
+    # eviction writes what the background flush has not caught yet
+    execute_sql(session_id, "INSERT INTO t VALUES (3)")
+    manager.drop(session_id)
+    assert sqlite3.connect(snapshot).execute("SELECT count(*) FROM t").fetchone() == (3,)
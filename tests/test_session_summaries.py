@@ -0,0 +1,33 @@
+import asyncio
+
+from google.adk.events import Event
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from backend.services.session_summaries import list_session_summaries
+
+
+def _message(author, text):
+    return Event(author=author, content=types.Content(role="user" if author == "user" else "model",
+                                                      parts=[types.Part(text=text)]))
+
+
+def test_old_sessions_are_summarized_without_being_touched():
+    async def scenario():
+        service = InMemorySessionService()
+        session = await service.create_session(app_name="app", user_id="user")
+        for event in (_message("user", "What is a JOIN?"), _message("teacher_agent", "A JOIN ..."),
+                      _message("user", "And a LEFT JOIN?")):
+            await service.append_event(session, event)
+        before = await service.get_session(app_name="app", user_id="user", session_id=session.id)
+
+        summaries = await list_session_summaries(service, "app", "user")
+
+        after = await service.get_session(app_name="app", user_id="user", session_id=session.id)
+        return before, after, summaries
+
+    before, after, summaries = asyncio.run(scenario())
+    assert summaries[0]["title"] == "What is a JOIN?"
+    assert summaries[0]["turn_count"] == 2
+    assert after.last_update_time == before.last_update_time
+    assert len(after.events) == len(before.events)